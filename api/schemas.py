@@ -1,7 +1,7 @@
 """Pydantic models for request/response validation."""
 
 from pydantic import BaseModel, Field
-from typing import Optional, Dict
+from typing import Any, Dict, List, Optional
 
 
 class ImageGenerationResponse(BaseModel):
@@ -38,4 +38,28 @@ class HealthResponse(BaseModel):
     status: str = Field(..., description="Health status")
     message: str = Field(..., description="Health message")
     timestamp: str = Field(..., description="Response timestamp")
-    services: Optional[Dict[str, str]] = Field(None, description="Detailed service statuses") 
\ No newline at end of file
+    services: Optional[Dict[str, str]] = Field(None, description="Detailed service statuses")
+
+
+class PaginationInfo(BaseModel):
+    """Pagination metadata for list responses."""
+    
+    page: int = Field(..., description="Current page number")
+    limit: int = Field(..., description="Page size")
+    total_count: int = Field(..., description="Number of records returned")
+
+
+class GenerationListResponse(BaseModel):
+    """Response schema for the generations listing endpoint."""
+    
+    generations: List[Dict[str, Any]] = Field(..., description="Generation records")
+    pagination: PaginationInfo = Field(..., description="Pagination metadata")
+
+
+class StatisticsResponse(BaseModel):
+    """Response schema for the statistics endpoint."""
+    
+    total_generations: int = Field(..., description="Total number of generations")
+    status_breakdown: Dict[str, int] = Field(..., description="Generation counts per status")
+    services: Dict[str, str] = Field(..., description="Service health statuses")
+    timestamp: str = Field(..., description="Response timestamp")
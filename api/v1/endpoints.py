@@ -2,15 +2,16 @@
 
 import time
 import uuid
-from datetime import datetime
 from typing import Optional
 from fastapi import APIRouter, UploadFile, File, HTTPException, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
+from api.schemas import GenerationListResponse, StatisticsResponse
 from services.stability_ai_generation import StabilityAIGenerator  
 from services.supabase_client import supabase_service
 from services.supabase_storage import storage_service
 from services.image_processing import convert_image_to_base64
 from utils.logging_config import get_logger
+from utils.now import isoformat_utc_now
 from config.settings import settings
 from utils.exceptions import (
     FileSizeExceededError,
@@ -22,6 +23,9 @@ from utils.exceptions import (
 logger = get_logger(__name__)
 router = APIRouter()
 
+# Upload MIME types accepted by /generate
+ALLOWED_IMAGE_TYPES = frozenset({"image/jpeg", "image/png", "image/webp"})
+
 # Initialize Stability.ai generator
 stability_generator = None
 try:
@@ -37,15 +41,30 @@ if storage_service:
 else:
     logger.warning("⚠️ Supabase Storage service not available")
 
+@router.on_event("startup")
+async def warm_up_http_clients():
+    """Open the storage connection before the first request needs it."""
+    if storage_service:
+        await storage_service.warm_up()
+
+@router.on_event("shutdown")
+async def close_http_clients():
+    """Flush queued database writes and close pooled HTTP clients on application shutdown."""
+    await supabase_service.close()
+    if stability_generator:
+        await stability_generator.close()
+    if storage_service:
+        await storage_service.close()
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint."""
     stability_healthy = stability_generator is not None
-    supabase_healthy = supabase_service.is_available()
+    supabase_healthy = await supabase_service.healthcheck()
     
     return {
         "status": "healthy" if (stability_healthy and supabase_healthy) else "unhealthy",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": isoformat_utc_now(),
         "services": {
             "stability_ai": "healthy" if stability_healthy else "unhealthy",
             "supabase": "healthy" if supabase_healthy else "unhealthy"
@@ -73,8 +92,7 @@ async def generate_image(
         file_content = await image.read()
         
         # 🔍 TIP KONTROLÜ
-        allowed_types = ["image/jpeg", "image/png", "image/webp"]
-        if not image.content_type or image.content_type not in allowed_types:
+        if not image.content_type or image.content_type not in ALLOWED_IMAGE_TYPES:
             error_response = {
                 "success": False,
                 "error": f"❌ Geçersiz dosya tipi! İzin verilen tipler: JPEG, PNG, WebP. Gönderilen: {image.content_type}"
@@ -137,15 +155,9 @@ async def generate_image(
             if storage_service:
                 logger.info("💾 Starting Supabase Storage save operations...")
                 try:
-                    # Save original image to bucket
+                    # Original image goes to the bucket as uploaded
                     logger.info(f"💾 Saving original image: {image.filename}, size: {len(processed_image)} bytes")
-                    _, original_url = await storage_service.upload_image(
-                        image_bytes=processed_image,
-                        filename=image.filename,
-                        folder="originals",
-                        content_type=image.content_type or "image/png"
-                    )
-                    logger.info(f"✅ Original image saved to bucket: {original_url}")
+                    uploads = [(processed_image, image.filename, "originals", image.content_type or "image/png")]
                     
                     # Save generated image to bucket
                     logger.info(f"🔍 Generated image type: {type(final_image)}")
@@ -162,33 +174,44 @@ async def generate_image(
                             # Convert PIL back to bytes with PNG format for storage
                             img_bytes = io.BytesIO()
                             pil_image.save(img_bytes, format='PNG')
-                            generated_bytes = img_bytes.getvalue()
                         elif hasattr(final_image, 'save'):
                             # final_image is already PIL Image
                             import io
                             img_bytes = io.BytesIO()
                             final_image.save(img_bytes, format='PNG')
-                            generated_bytes = img_bytes.getvalue()
                         else:
                             logger.error(f"❌ Unknown generated image type: {type(final_image)}")
-                            generated_url = None
                             raise Exception(f"Unknown image type: {type(final_image)}")
                         
-                        logger.info(f"💾 Generated image ready for upload: {len(generated_bytes)} bytes")
-                        
-                        _, generated_url = await storage_service.upload_image(
-                            image_bytes=generated_bytes,
-                            filename=f"generated_{image.filename.split('.')[0]}.png",
-                            folder="generations",
-                            content_type="image/png"
-                        )
-                        logger.info(f"✅ Generated image saved to bucket: {generated_url}")
+                        # Upload straight from the encode buffer, without copying it out
+                        logger.info(f"💾 Generated image ready for upload: {img_bytes.tell()} bytes")
+                        img_bytes.seek(0)
+                        uploads.append((
+                            img_bytes,
+                            f"generated_{image.filename.split('.')[0]}.png",
+                            "generations",
+                            "image/png"
+                        ))
                         
                     except Exception as gen_error:
-                        logger.error(f"❌ Failed to save generated image: {gen_error}")
+                        logger.error(f"❌ Failed to prepare generated image: {gen_error}")
                         import traceback
                         logger.error(f"🔍 Generated image error: {traceback.format_exc()}")
-                        generated_url = None
+                    
+                    # Upload original and generated images together; each one
+                    # that succeeds keeps its URL even if the other fails
+                    uploaded = await storage_service.upload_images(uploads)
+                    if uploaded[0]:
+                        original_url = uploaded[0][1]
+                        logger.info(f"✅ Original image saved to bucket: {original_url}")
+                    else:
+                        logger.error("❌ Failed to save original image to bucket")
+                    if len(uploaded) > 1:
+                        if uploaded[1]:
+                            generated_url = uploaded[1][1]
+                            logger.info(f"✅ Generated image saved to bucket: {generated_url}")
+                        else:
+                            logger.error("❌ Failed to save generated image to bucket")
                     
                 except Exception as e:
                     logger.error(f"❌ Failed to save images to bucket: {e}")
@@ -228,12 +251,12 @@ async def generate_image(
                             
                         logger.info(f"📝 Update data: {update_data}")
                         
-                        result = supabase_service.client.table('image_generations').update(update_data).eq('id', generation_id).execute()
-                        logger.info(f"✅ URLs updated in Supabase record {generation_id}: {result.data}")
+                        if await supabase_service.update_generation_fields(generation_id, update_data):
+                            logger.info(f"✅ URLs updated in Supabase record {generation_id}")
+                        else:
+                            logger.error(f"❌ Failed to update URLs in Supabase record {generation_id}")
                     except Exception as url_error:
                         logger.error(f"❌ Failed to update URLs in Supabase: {url_error}")
-                        import traceback
-                        logger.error(f"🔍 URL update traceback: {traceback.format_exc()}")
                 else:
                     logger.warning(f"⚠️ No URLs to update for record {generation_id}")
                 if update_result:
@@ -276,7 +299,13 @@ async def generate_image(
             "error": str(e)
         }
 
-@router.get("/generations")
+# Read endpoints return rows straight from Supabase, so they skip response_model
+# validation and serialize with orjson; the schemas are kept for the OpenAPI docs.
+@router.get(
+    "/generations",
+    response_class=ORJSONResponse,
+    responses={200: {"model": GenerationListResponse}}
+)
 async def get_generations(
     page: int = Query(default=1, ge=1),
     limit: int = Query(default=20, ge=1, le=100),
@@ -287,49 +316,44 @@ async def get_generations(
         raise HTTPException(status_code=503, detail="Database service is not available")
     
     try:
-        offset = (page - 1) * limit
-        query = supabase_service.client.table("image_generations").select("*")
+        generations = await supabase_service.list_generations(limit=limit, offset=(page - 1) * limit, status=status)
+        if generations is None:
+            raise HTTPException(status_code=500, detail="Failed to fetch generations")
         
-        if status:
-            query = query.eq("status", status)
-        
-        response = query.order("created_at", desc=True).range(offset, offset + limit - 1).execute()
-        generations = response.data if response.data else []
-        
-        return {
+        return ORJSONResponse({
             "generations": generations,
-                "pagination": {
-                    "page": page,
-                    "limit": limit,
+            "pagination": {
+                "page": page,
+                "limit": limit,
                 "total_count": len(generations)
             }
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to fetch generations")
 
-@router.get("/statistics")
+@router.get(
+    "/statistics",
+    response_class=ORJSONResponse,
+    responses={200: {"model": StatisticsResponse}}
+)
 async def get_statistics():
     """Get generation statistics."""
     if not supabase_service.is_available():
         raise HTTPException(status_code=503, detail="Database service is not available")
     
     try:
-        completed_response = supabase_service.client.table("image_generations").select("*", count="exact").eq("status", "completed").execute()
-        failed_response = supabase_service.client.table("image_generations").select("*", count="exact").eq("status", "failed").execute()
+        status_breakdown = await supabase_service.count_generations_by_status(["completed", "failed"])
+        if status_breakdown is None:
+            raise HTTPException(status_code=500, detail="Failed to fetch statistics")
         
-        status_breakdown = {
-            "completed": completed_response.count if hasattr(completed_response, "count") else 0,
-            "failed": failed_response.count if hasattr(failed_response, "count") else 0
-        }
-        
-        return {
+        return ORJSONResponse({
             "total_generations": sum(status_breakdown.values()),
             "status_breakdown": status_breakdown,
             "services": {
                 "stability_ai": "healthy" if stability_generator else "unhealthy",
                 "supabase": "healthy" if supabase_service.is_available() else "unhealthy"
             },
-            "timestamp": datetime.now().isoformat()
-        }
+            "timestamp": isoformat_utc_now()
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to fetch statistics")
\ No newline at end of file
@@ -3,29 +3,53 @@
 import pytest
 import pytest_asyncio
 import asyncio
-from httpx import AsyncClient
+from asgi_lifespan import LifespanManager
+from httpx import ASGITransport, AsyncClient
 import tempfile
 import os
-from PIL import Image
+import PIL
+from PIL import Image, features
 import io
 
+try:
+    import uvloop
+except ImportError:  # uvloop is not available on Windows
+    uvloop = None
+
 from main import app
 from config.settings import settings
 
 
-@pytest.fixture(scope="session")
-def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+def pytest_asyncio_loop_factories(config, item):
+    """Run async tests on uvloop when it is installed, like the server does."""
+    if uvloop is not None:
+        return {"uvloop": uvloop.new_event_loop}
+    return None
+
+
+@pytest.fixture(scope="session", autouse=True)
+def pillow_simd_loaded():
+    """Fail fast on AVX2 CI runners (REQUIRE_PILLOW_SIMD=1) if stock Pillow was installed."""
+    if os.getenv("REQUIRE_PILLOW_SIMD", "").lower() in ("1", "true"):
+        assert ".post" in PIL.__version__, (
+            f"Expected a Pillow-SIMD build, found Pillow {PIL.__version__}"
+        )
+
 
+@pytest.fixture(scope="session", autouse=True)
+def libjpeg_turbo_linked():
+    """JPEG round trips in the tests assume Pillow's JPEG codec is libjpeg-turbo."""
+    assert features.check_feature("libjpeg_turbo"), (
+        "Pillow is not linked against libjpeg-turbo; install libjpeg-turbo headers and reinstall Pillow"
+    )
 
-@pytest_asyncio.fixture
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
 async def client():
-    """Create test client without database dependency."""
-    async with AsyncClient(app=app, base_url="http://test") as ac:
-        yield ac
+    """Create one test client, and run the app lifespan once, for the whole session."""
+    async with LifespanManager(app):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            yield ac
 
 
 @pytest.fixture
@@ -55,6 +79,87 @@ def sample_dog_image():
     return img_bytes
 
 
+# Synthetic image fixtures: file name -> (size, colour)
+_SAMPLE_IMAGES = {
+    "large_blue.png": ((2048, 1536), 'blue'),
+    "large_blue.jpg": ((2048, 1536), 'blue'),
+    "square_red.png": ((1500, 1500), 'red'),
+    "portrait_green.png": ((800, 1200), 'green'),
+    "wide_cyan.png": ((3000, 100), 'cyan'),
+    "tiny_yellow.png": ((10, 10), 'yellow'),
+}
+
+_SAMPLE_FORMATS = {".png": "PNG", ".jpg": "JPEG"}
+
+
+@pytest.fixture(scope="session")
+def sample_image_dir(request, tmp_path_factory):
+    """
+    Directory of pre-serialized synthetic images.
+    
+    The files live in the pytest cache when it is enabled, so they are only
+    encoded on the first run; otherwise they are written once per session.
+    """
+    cache = getattr(request.config, "cache", None)
+    directory = cache.mkdir("sample_images") if cache is not None else tmp_path_factory.mktemp("sample_images")
+    for name, (size, color) in _SAMPLE_IMAGES.items():
+        path = directory / name
+        if not path.exists():
+            # PNGs use a fast zlib level, tests only need valid files; written via rename so
+            # parallel xdist workers never read a half-written file
+            partial = path.with_name(f"{name}.{os.getpid()}.tmp")
+            Image.new('RGB', size, color=color).save(partial, format=_SAMPLE_FORMATS[path.suffix], compress_level=1)
+            os.replace(partial, path)
+    return directory
+
+
+@pytest.fixture(scope="session")
+def large_rgb_png_bytes(sample_image_dir):
+    """A 2048x1536 PNG, larger than the default max dimension."""
+    return (sample_image_dir / "large_blue.png").read_bytes()
+
+
+@pytest.fixture(scope="session")
+def large_rgb_jpeg_bytes(sample_image_dir):
+    """A 2048x1536 JPEG, larger than the default max dimension."""
+    return (sample_image_dir / "large_blue.jpg").read_bytes()
+
+
+@pytest.fixture(scope="session")
+def square_png_bytes(sample_image_dir):
+    """A 1500x1500 PNG."""
+    return (sample_image_dir / "square_red.png").read_bytes()
+
+
+@pytest.fixture(scope="session")
+def portrait_png_bytes(sample_image_dir):
+    """An 800x1200 portrait PNG."""
+    return (sample_image_dir / "portrait_green.png").read_bytes()
+
+
+@pytest.fixture(scope="session")
+def wide_png_bytes(sample_image_dir):
+    """A 3000x100 PNG with an extreme aspect ratio."""
+    return (sample_image_dir / "wide_cyan.png").read_bytes()
+
+
+@pytest.fixture(scope="session")
+def tiny_png_bytes(sample_image_dir):
+    """A 10x10 PNG."""
+    return (sample_image_dir / "tiny_yellow.png").read_bytes()
+
+
+@pytest.fixture(scope="session")
+def format_sample_images():
+    """500x500 purple images keyed by (format, color mode), encoded once per session."""
+    samples = {}
+    for image_format, color_mode in [("JPEG", "RGB"), ("PNG", "RGBA"), ("WebP", "RGB")]:
+        img_buffer = io.BytesIO()
+        Image.new(color_mode, (500, 500), color='purple').save(img_buffer, format=image_format)
+        samples[(image_format, color_mode)] = img_buffer.getvalue()
+    return samples
+
+
 @pytest.fixture
 def sample_large_image():
     """Create a large image for size testing."""
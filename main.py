@@ -41,6 +41,12 @@ async def health_check():
 
 # Import and include routers after app initialization
 try:
+    from config.settings import settings
+    from utils.logging_config import configure_logging
+    
+    # Set up structlog and the stdlib level before the services start logging
+    configure_logging(settings.log_level)
+    
     from api.v1.endpoints import router as api_router
     app.include_router(api_router, prefix="/api/v1", tags=["API v1"])
 except Exception as e:
@@ -51,10 +57,20 @@ app = app  # Make sure app is available for Vercel
 
 # For local development
 if __name__ == "__main__":
+    # Auto-reload only works with a single worker; otherwise one worker per core
+    # (the handlers are async, so more workers than cores only adds contention)
+    reload = os.getenv("RELOAD", "false").lower() == "true"
+    workers = 1 if reload else int(os.getenv("WORKERS", os.cpu_count() or 1))
+    
     uvicorn.run(
         "main:app",
         host="0.0.0.0", 
         port=3001,
-        reload=True,
+        # "auto" picks uvloop and httptools when installed (uvicorn[standard]),
+        # and falls back to asyncio and h11 elsewhere
+        loop="auto",
+        http="auto",
+        workers=workers,
+        reload=reload,
         log_level="info"
-    ) 
\ No newline at end of file
+    )
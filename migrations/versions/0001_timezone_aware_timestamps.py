@@ -0,0 +1,60 @@
+"""Use timezone-aware timestamp columns
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-15 12:00:00
+
+Documentation only: the Alembic environment can't run in this tree, since
+migrations/env.py and models/image_generation.py import database.connection,
+which no longer exists, and the service talks to Supabase over its REST API
+rather than SQLAlchemy. Schemas created by database/create_tables.sql or
+database/supabase_setup.sql already use TIMESTAMP WITH TIME ZONE; for an
+older hand-made schema with naive columns, run the equivalent SQL by hand in
+the Supabase SQL editor, once per column in TIMESTAMP_COLUMNS:
+
+    ALTER TABLE image_generations
+        ALTER COLUMN created_at TYPE TIMESTAMPTZ USING created_at AT TIME ZONE 'UTC';
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TIMESTAMP_COLUMNS = {
+    "image_generations": ("created_at", "started_at", "completed_at"),
+    "generation_statistics": ("date",),
+}
+
+
+def _alter_columns(timezone: bool) -> None:
+    """Convert timestamp columns between naive (UTC) and timezone-aware types."""
+    inspector = sa.inspect(op.get_bind())
+    for table, columns in TIMESTAMP_COLUMNS.items():
+        for column in inspector.get_columns(table):
+            name = column["name"]
+            # Skip columns that already have the target type (e.g. created by the SQL setup scripts)
+            if name not in columns or getattr(column["type"], "timezone", False) == timezone:
+                continue
+            op.alter_column(
+                table,
+                name,
+                type_=sa.DateTime(timezone=timezone),
+                postgresql_using=f"{name} AT TIME ZONE 'UTC'",
+            )
+
+
+def upgrade() -> None:
+    _alter_columns(timezone=True)
+
+
+def downgrade() -> None:
+    _alter_columns(timezone=False)
@@ -39,9 +39,9 @@ class ImageGeneration(Base):
     logo_applied = Column(Boolean, default=False)
     
     # Timestamps
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    started_at = Column(DateTime)  # When processing started
-    completed_at = Column(DateTime)  # When processing completed
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    started_at = Column(DateTime(timezone=True))  # When processing started
+    completed_at = Column(DateTime(timezone=True))  # When processing completed
     
     def to_dict(self):
         """Convert to dictionary for API responses."""
@@ -71,14 +71,8 @@ class ImageGeneration(Base):
         elif status in ["completed", "failed"]:
             self.completed_at = now
             if self.started_at:
-                # Ensure both datetimes are timezone-aware for calculation
-                if self.started_at.tzinfo is None:
-                    # Convert naive datetime to UTC if needed
-                    started_utc = self.started_at.replace(tzinfo=timezone.utc)
-                else:
-                    started_utc = self.started_at
-                
-                self.processing_time = (self.completed_at - started_utc).total_seconds()
+                # Timestamp columns are timezone-aware, so no normalization is needed
+                self.processing_time = (self.completed_at - self.started_at).total_seconds()
 
 
 class GenerationStatistics(Base):
@@ -87,7 +81,7 @@ class GenerationStatistics(Base):
     __tablename__ = "generation_statistics"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    date = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    date = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     
     # Daily statistics
     total_generations = Column(Integer, default=0)
@@ -0,0 +1,137 @@
+"""Batched file writes for local storage, using io_uring where available."""
+
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+try:
+    # Optional Linux-only binding: pip install liburing
+    import liburing
+except ImportError:
+    liburing = None
+
+
+_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+
+# Submission queue depth of each thread's ring; larger batches use several submissions
+RING_ENTRIES = 64
+
+# Holds each thread's io_uring ring, so rings are set up once per thread, not per call
+_thread_state = threading.local()
+
+
+def _write_remaining(fd: int, data: bytes, offset: int) -> None:
+    """Write data[offset:] to fd at the same file offset, handling short writes."""
+    view = memoryview(data)[offset:]
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+def write_file(path: Path, data: bytes) -> None:
+    """Write bytes to a file with raw os.write calls, bypassing buffered IO."""
+    fd = os.open(path, _OPEN_FLAGS, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            # os.write may write fewer bytes than requested
+            written = os.write(fd, view)
+            view = view[written:]
+    finally:
+        os.close(fd)
+
+
+class _ThreadRing:
+    """An io_uring ring owned by one thread, torn down with the thread's locals."""
+    
+    def __init__(self):
+        ring = liburing.Ring()
+        # Raises OSError when io_uring is disabled (old kernel, seccomp, container policy)
+        liburing.io_uring_queue_init(RING_ENTRIES, ring)
+        self.ring = ring
+    
+    def __del__(self):
+        ring = getattr(self, "ring", None)
+        if ring is not None:
+            liburing.io_uring_queue_exit(ring)
+
+
+def _thread_ring() -> Optional[_ThreadRing]:
+    """Return this thread's ring, set up on first use, or None if io_uring is unavailable."""
+    try:
+        return _thread_state.ring
+    except AttributeError:
+        pass
+    try:
+        ring = _ThreadRing()
+    except OSError:
+        ring = None
+    _thread_state.ring = ring
+    return ring
+
+
+def _submit_batch(ring, paths_and_bytes: List[Tuple[Path, bytes]]) -> None:
+    """Queue one write per file on ring, submit them together and drain the completions."""
+    fds: List[int] = []
+    try:
+        # Open everything first so a failed open never leaves SQEs queued on the ring
+        for path, _ in paths_and_bytes:
+            fds.append(os.open(path, _OPEN_FLAGS, 0o644))
+        
+        for index, (fd, (_, data)) in enumerate(zip(fds, paths_and_bytes)):
+            sqe = liburing.io_uring_get_sqe(ring)
+            liburing.io_uring_prep_write(sqe, fd, data, 0)
+            liburing.io_uring_sqe_set_data64(sqe, index)
+        
+        liburing.io_uring_submit_and_wait(ring, len(fds))
+        
+        # Drain every completion before raising, so none are left for the next batch
+        error = None
+        cqe = liburing.Cqe()
+        pending = len(fds)
+        while pending:
+            liburing.io_uring_wait_cqe(ring, cqe)
+            ready = liburing.io_uring_cq_ready(ring)
+            for i in range(ready):
+                entry = cqe[i]
+                index, result = entry.user_data, entry.res
+                path, data = paths_and_bytes[index]
+                if result < 0:
+                    error = error or OSError(-result, os.strerror(-result), str(path))
+                elif result < len(data) and error is None:
+                    _write_remaining(fds[index], data, result)
+            liburing.io_uring_cq_advance(ring, ready)
+            pending -= ready
+        
+        if error is not None:
+            raise error
+    finally:
+        for fd in fds:
+            os.close(fd)
+
+
+def submit_writes(paths_and_bytes: List[Tuple[Path, bytes]]) -> None:
+    """
+    Write several files with batched io_uring submissions.
+    
+    One write SQE is queued per file and up to RING_ENTRIES of them are
+    submitted together on the calling thread's ring, which is reused across
+    calls. Falls back to sequential raw writes when liburing is not installed
+    or io_uring is unavailable.
+    
+    Args:
+        paths_and_bytes: List of (path, data) pairs to write
+        
+    Raises:
+        OSError: If opening or writing any file fails
+    """
+    thread_ring = _thread_ring() if liburing is not None and len(paths_and_bytes) >= 2 else None
+    if thread_ring is None:
+        for path, data in paths_and_bytes:
+            write_file(path, data)
+        return
+    
+    for start in range(0, len(paths_and_bytes), RING_ENTRIES):
+        _submit_batch(thread_ring.ring, paths_and_bytes[start:start + RING_ENTRIES])
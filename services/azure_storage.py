@@ -1,10 +1,16 @@
 """Azure Blob Storage service for image storage and retrieval."""
 
-import uuid
+import os
 import io
-from datetime import datetime, timedelta
+import base64
+import hashlib
+import hmac
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Optional, Tuple
-from azure.storage.blob import BlobServiceClient, BlobClient, generate_blob_sas, BlobSasPermissions
+from urllib.parse import quote
+from azure.storage.blob import BlobServiceClient, BlobClient
 from azure.core.exceptions import ResourceNotFoundError, ResourceExistsError
 
 from config.settings import settings
@@ -13,6 +19,9 @@ from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Storage service version used when signing SAS tokens
+SAS_VERSION = "2020-12-06"
+
 
 class AzureStorageService:
     """Service for managing image storage in Azure Blob Storage."""
@@ -25,6 +34,18 @@ class AzureStorageService:
                 credential=settings.azure_storage_account_key
             )
             self.container_name = settings.azure_storage_container_name
+            
+            # Precompute signing key and URL prefix used for every SAS URL
+            self._account_key = base64.b64decode(settings.azure_storage_account_key)
+            self._url_prefix = (
+                f"https://{settings.azure_storage_account_name}.blob.core.windows.net/"
+                f"{self.container_name}/"
+            )
+            self._resource_prefix = (
+                f"/blob/{settings.azure_storage_account_name}/{self.container_name}/"
+            )
+            self._cached_sas_url = lru_cache(maxsize=1024)(self._build_sas_url)
+            
             self._ensure_container_exists()
             logger.info("Azure Blob Storage client initialized successfully")
         except Exception as e:
@@ -73,10 +94,12 @@ class AzureStorageService:
             # Generate filename if not provided
             if not filename:
                 file_extension = self._get_extension_from_content_type(content_type)
-                filename = f"{uuid.uuid4()}{file_extension}"
+                filename = f"{os.urandom(16).hex()}{file_extension}"
             
             # Create blob name with folder structure
-            blob_name = f"{folder}/{datetime.utcnow().strftime('%Y/%m/%d')}/{filename}"
+            now = datetime.now(timezone.utc)
+            date_path = f"{now.year:04d}/{now.month:02d}/{now.day:02d}"
+            blob_name = f"{folder}/{date_path}/{filename}"
             
             # Upload to blob storage
             blob_client = self.blob_service_client.get_blob_client(
@@ -161,21 +184,9 @@ class AzureStorageService:
             SAS URL for the blob
         """
         try:
-            # Convert permissions string to BlobSasPermissions
-            sas_permissions = BlobSasPermissions(read=True if 'r' in permissions else False)
-            
-            # Generate SAS token
-            sas_token = generate_blob_sas(
-                account_name=settings.azure_storage_account_name,
-                account_key=settings.azure_storage_account_key,
-                container_name=self.container_name,
-                blob_name=blob_name,
-                permission=sas_permissions,
-                expiry=datetime.utcnow() + timedelta(hours=expiry_hours)
-            )
-            
-            # Construct full URL
-            blob_url = f"https://{settings.azure_storage_account_name}.blob.core.windows.net/{self.container_name}/{blob_name}?{sas_token}"
+            # SAS URLs are reused for all requests within the same UTC hour
+            hour_bucket = int(time.time() // 3600)
+            blob_url = self._cached_sas_url(blob_name, expiry_hours, permissions, hour_bucket)
             
             logger.info(
                 "Generated SAS URL",
@@ -189,6 +200,51 @@ class AzureStorageService:
             logger.error("Failed to generate SAS URL", error=str(e))
             raise ImageProcessingError(f"Failed to generate secure URL: {str(e)}")
     
+    def _build_sas_url(
+        self,
+        blob_name: str,
+        expiry_hours: int,
+        permissions: str,
+        hour_bucket: int
+    ) -> str:
+        """
+        Sign a blob service SAS token with the cached account key.
+        
+        The expiry is anchored to the end of the current hour bucket so the
+        token stays valid for at least ``expiry_hours`` while it is cached.
+        """
+        signed_permission = "r" if "r" in permissions else ""
+        expiry = datetime.fromtimestamp((hour_bucket + 1 + expiry_hours) * 3600, tz=timezone.utc)
+        signed_expiry = expiry.strftime("%Y-%m-%dT%H:%M:%SZ")
+        
+        string_to_sign = "\n".join([
+            signed_permission,
+            "",  # signed start
+            signed_expiry,
+            self._resource_prefix + blob_name,
+            "",  # signed identifier
+            "",  # signed IP
+            "",  # signed protocol
+            SAS_VERSION,
+            "b",  # signed resource (blob)
+            "",  # signed snapshot time
+            "",  # signed encryption scope
+            "",  # rscc
+            "",  # rscd
+            "",  # rsce
+            "",  # rscl
+            "",  # rsct
+        ])
+        signature = base64.b64encode(
+            hmac.new(self._account_key, string_to_sign.encode("utf-8"), hashlib.sha256).digest()
+        ).decode("utf-8")
+        
+        sas_token = (
+            f"se={quote(signed_expiry, safe='')}&sp={signed_permission}"
+            f"&sv={SAS_VERSION}&sr=b&sig={quote(signature, safe='')}"
+        )
+        return f"{self._url_prefix}{blob_name}?{sas_token}"
+    
     async def delete_image(self, blob_name: str) -> bool:
         """
         Delete image from Azure Blob Storage.
@@ -1,8 +1,9 @@
 """Image processing service for validation, conversion, and logo overlay."""
 
-import base64
 import io
-from typing import Tuple
+import mmap
+from typing import Iterable, Optional, Tuple, Union
+import pybase64
 from PIL import Image, ImageDraw
 from fastapi import UploadFile
 
@@ -18,10 +19,23 @@ from utils.logging_config import get_logger
 logger = get_logger(__name__)
 
 
+def _map_spooled_upload(file: UploadFile) -> Optional[mmap.mmap]:
+    """Map an upload's spool file read-only if it has been rolled over to disk."""
+    spool = file.file
+    if not getattr(spool, "_rolled", False):
+        return None
+    try:
+        # Push buffered writes to the OS file before mapping it
+        spool.flush()
+        return mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+
 async def validate_and_process_image(
     file: UploadFile, 
     max_size_mb: int, 
-    allowed_types: list
+    allowed_types: Iterable[str]
 ) -> bytes:
     """
     Validate and process uploaded image.
@@ -29,7 +43,7 @@ async def validate_and_process_image(
     Args:
         file: FastAPI UploadFile object
         max_size_mb: Maximum allowed file size in MB
-        allowed_types: List of allowed MIME types
+        allowed_types: Allowed MIME types; pass a frozenset to skip the per-call conversion
         
     Returns:
         Image content as bytes
@@ -39,12 +53,19 @@ async def validate_and_process_image(
         InvalidFileTypeError: If file type is not allowed
         ImageProcessingError: If image processing fails
     """
+    # Uploads that spilled to disk are mapped instead of read, so oversized or
+    # invalid files are rejected without copying them into memory first
+    mapped = _map_spooled_upload(file)
     try:
-        # Read file content
-        content = await file.read()
+        if mapped is not None:
+            file_size = len(mapped)
+        else:
+            # Read file content
+            content = await file.read()
+            file_size = len(content)
         
         # Validate file size
-        file_size_mb = len(content) / (1024 * 1024)
+        file_size_mb = file_size / (1024 * 1024)
         if file_size_mb > max_size_mb:
             raise FileSizeExceededError(
                 f"File size {file_size_mb:.2f}MB exceeds limit of {max_size_mb}MB"
@@ -52,14 +73,16 @@ async def validate_and_process_image(
         
         # Validate file type
         content_type = file.content_type
+        if not isinstance(allowed_types, (set, frozenset)):
+            allowed_types = frozenset(allowed_types)
         if content_type not in allowed_types:
             raise InvalidFileTypeError(
-                f"File type {content_type} not allowed. Allowed types: {allowed_types}"
+                f"File type {content_type} not allowed. Allowed types: {sorted(allowed_types)}"
             )
         
         # Validate that it's actually an image by trying to open it
         try:
-            image = Image.open(io.BytesIO(content))
+            image = Image.open(mapped if mapped is not None else io.BytesIO(content))
             image.verify()  # Verify it's a valid image
             logger.info(
                 "Image validated successfully",
@@ -70,6 +93,10 @@ async def validate_and_process_image(
         except Exception as e:
             raise ImageProcessingError(f"Invalid image file: {str(e)}")
         
+        if mapped is not None:
+            # One copy straight out of the page cache
+            content = mapped[:]
+        
         return content
         
     except (FileSizeExceededError, InvalidFileTypeError, ImageProcessingError):
@@ -77,29 +104,40 @@ async def validate_and_process_image(
     except Exception as e:
         logger.error("Unexpected error in image validation", error=str(e))
         raise ImageProcessingError(f"Failed to process image: {str(e)}")
+    finally:
+        if mapped is not None:
+            mapped.close()
 
 
-def convert_image_to_base64(image_bytes: bytes, image_format: str = "PNG") -> str:
+# Data URI prefixes, encoded once per format
+_DATA_URI_PREFIXES = {
+    image_format: f"data:image/{image_format.lower()};base64,".encode('ascii')
+    for image_format in ("PNG", "JPEG", "WEBP")
+}
+
+
+def convert_image_to_base64_bytes(image_bytes: Union[bytes, memoryview], image_format: str = "PNG") -> bytes:
     """
-    Convert image bytes to base64 encoded string with data URI prefix.
+    Convert image bytes to an ASCII base64 data URI, kept as bytes.
     
     Args:
-        image_bytes: Image content as bytes
+        image_bytes: Image content as bytes or a memoryview over them
         image_format: Output image format (PNG, JPEG, etc.)
         
     Returns:
-        Base64 encoded string with data URI prefix
+        Base64 encoded data URI as ASCII bytes
         
     Raises:
         ImageProcessingError: If conversion fails
     """
     try:
-        # Encode to base64
-        base64_encoded = base64.b64encode(image_bytes).decode('utf-8')
-        
         # Create data URI with appropriate MIME type
-        mime_type = f"image/{image_format.lower()}"
-        data_uri = f"data:{mime_type};base64,{base64_encoded}"
+        prefix = _DATA_URI_PREFIXES.get(image_format)
+        if prefix is None:
+            prefix = f"data:image/{image_format.lower()};base64,".encode('ascii')
+        
+        # Encode to base64 (pybase64 picks the SSSE3/AVX2 codec at import)
+        data_uri = prefix + pybase64.b64encode(image_bytes)
         
         logger.info(
             "Image converted to base64",
@@ -114,16 +152,121 @@ def convert_image_to_base64(image_bytes: bytes, image_format: str = "PNG") -> st
         raise ImageProcessingError(f"Failed to convert image to base64: {str(e)}")
 
 
-def overlay_logo(background_image_bytes: bytes, logo_path: str) -> bytes:
+def convert_image_to_base64(image_bytes: bytes, image_format: str = "PNG") -> str:
+    """
+    Convert image bytes to base64 encoded string with data URI prefix.
+    
+    Args:
+        image_bytes: Image content as bytes
+        image_format: Output image format (PNG, JPEG, etc.)
+        
+    Returns:
+        Base64 encoded string with data URI prefix
+        
+    Raises:
+        ImageProcessingError: If conversion fails
+    """
+    return convert_image_to_base64_bytes(image_bytes, image_format).decode('ascii')
+
+
+def convert_image_to_base64_from_image(image: Image.Image, image_format: str = "PNG") -> str:
+    """
+    Encode a PIL image and convert it to a base64 data URI in one step.
+    
+    The encoded image is base64-encoded straight from the BytesIO buffer
+    through a memoryview, without copying it out as bytes first.
+    
+    Args:
+        image: PIL image to encode
+        image_format: Output image format (PNG, JPEG, etc.)
+        
+    Returns:
+        Base64 encoded string with data URI prefix
+        
+    Raises:
+        ImageProcessingError: If encoding or conversion fails
+    """
+    output_buffer = io.BytesIO()
+    try:
+        image.save(output_buffer, format=image_format)
+    except Exception as e:
+        logger.error("Failed to encode image for base64", error=str(e))
+        raise ImageProcessingError(f"Failed to convert image to base64: {str(e)}")
+    
+    with output_buffer.getbuffer() as encoded:
+        return convert_image_to_base64_bytes(encoded, image_format).decode('ascii')
+
+
+
+def _load_logo(logo_path: str):
+    """Open the logo image in RGBA mode, or return None if it does not exist."""
+    try:
+        logo = Image.open(logo_path)
+    except FileNotFoundError:
+        logger.warning(f"Logo file not found at {logo_path}, skipping overlay")
+        return None
+    
+    if logo.mode != 'RGBA':
+        logo = logo.convert('RGBA')
+    return logo
+
+
+def _paste_logo(background: Image.Image, logo: Image.Image) -> Image.Image:
+    """Paste the logo in the bottom-right corner of an RGBA background image."""
+    # Calculate logo size (10% of background width, maintaining aspect ratio)
+    bg_width, bg_height = background.size
+    logo_width = int(bg_width * 0.1)
+    logo_ratio = logo.size[1] / logo.size[0]  # height/width
+    logo_height = int(logo_width * logo_ratio)
+    
+    # Resize logo
+    logo_resized = logo.resize((logo_width, logo_height), Image.Resampling.LANCZOS)
+    
+    # Position logo in bottom-right corner with padding
+    padding = 20
+    x_position = bg_width - logo_width - padding
+    y_position = bg_height - logo_height - padding
+    
+    # Create a copy of background for overlay
+    result = background.copy()
+    
+    # Paste logo with transparency
+    result.paste(logo_resized, (x_position, y_position), logo_resized)
+    
+    logger.info(
+        "Logo overlay completed",
+        logo_size=(logo_width, logo_height),
+        position=(x_position, y_position),
+        background_size=background.size
+    )
+    
+    return result
+
+
+def _fit_dimensions(width: int, height: int, max_dimension: int) -> Tuple[int, int]:
+    """Calculate dimensions that fit within max_dimension, keeping aspect ratio."""
+    if width > height:
+        return max_dimension, int((height * max_dimension) / width)
+    return int((width * max_dimension) / height), max_dimension
+
+
+def overlay_logo(
+    background_image_bytes: bytes,
+    logo_path: str,
+    compress_level: int = 1,
+    _return_image: bool = False
+) -> Union[bytes, Image.Image]:
     """
     Overlay GNB logo onto the generated image.
     
     Args:
         background_image_bytes: Generated image bytes
         logo_path: Path to the GNB logo image
+        compress_level: zlib level for the PNG output (1 favours speed over size)
+        _return_image: Return the composited PIL image instead of encoding it
         
     Returns:
-        Image with logo overlay as bytes
+        Image with logo overlay as bytes (or as a PIL image with _return_image)
         
     Raises:
         LogoOverlayError: If logo overlay fails
@@ -137,50 +280,19 @@ def overlay_logo(background_image_bytes: bytes, logo_path: str) -> bytes:
             background = background.convert('RGBA')
         
         # Open the logo image
-        try:
-            logo = Image.open(logo_path)
-        except FileNotFoundError:
-            logger.warning(f"Logo file not found at {logo_path}, skipping overlay")
+        logo = _load_logo(logo_path)
+        if logo is None:
             # Return original image if logo is not found
             return background_image_bytes
         
-        # Ensure logo is in RGBA mode
-        if logo.mode != 'RGBA':
-            logo = logo.convert('RGBA')
-        
-        # Calculate logo size (10% of background width, maintaining aspect ratio)
-        bg_width, bg_height = background.size
-        logo_width = int(bg_width * 0.1)
-        logo_ratio = logo.size[1] / logo.size[0]  # height/width
-        logo_height = int(logo_width * logo_ratio)
-        
-        # Resize logo
-        logo_resized = logo.resize((logo_width, logo_height), Image.Resampling.LANCZOS)
-        
-        # Position logo in bottom-right corner with padding
-        padding = 20
-        x_position = bg_width - logo_width - padding
-        y_position = bg_height - logo_height - padding
-        
-        # Create a copy of background for overlay
-        result = background.copy()
-        
-        # Paste logo with transparency
-        result.paste(logo_resized, (x_position, y_position), logo_resized)
+        result = _paste_logo(background, logo)
+        if _return_image:
+            return result
         
         # Convert back to bytes
         output_buffer = io.BytesIO()
-        result.save(output_buffer, format='PNG')
-        result_bytes = output_buffer.getvalue()
-        
-        logger.info(
-            "Logo overlay completed",
-            logo_size=(logo_width, logo_height),
-            position=(x_position, y_position),
-            background_size=background.size
-        )
-        
-        return result_bytes
+        result.save(output_buffer, format='PNG', compress_level=compress_level)
+        return output_buffer.getvalue()
         
     except LogoOverlayError:
         raise
@@ -212,12 +324,12 @@ def resize_image_if_needed(image_bytes: bytes, max_dimension: int = 1024) -> byt
             return image_bytes
         
         # Calculate new dimensions maintaining aspect ratio
-        if width > height:
-            new_width = max_dimension
-            new_height = int((height * max_dimension) / width)
-        else:
-            new_height = max_dimension
-            new_width = int((width * max_dimension) / height)
+        new_width, new_height = _fit_dimensions(width, height, max_dimension)
+        
+        # Let libjpeg decode at the smallest 1/2, 1/4 or 1/8 scale that still
+        # covers the target size, so the resize below works on fewer pixels
+        if image.format == 'JPEG':
+            image.draft(image.mode, (new_width, new_height))
         
         # Resize image
         resized_image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
@@ -239,4 +351,55 @@ def resize_image_if_needed(image_bytes: bytes, max_dimension: int = 1024) -> byt
         
     except Exception as e:
         logger.error("Failed to resize image", error=str(e))
-        raise ImageProcessingError(f"Failed to resize image: {str(e)}") 
\ No newline at end of file
+        raise ImageProcessingError(f"Failed to resize image: {str(e)}")
+
+
+def process_final_image(
+    background_image_bytes: bytes,
+    logo_path: str,
+    max_dimension: int = 1024
+) -> bytes:
+    """
+    Resize the generated image if needed and overlay the logo in a single pass.
+    
+    The image is decoded once, resized and composited in memory, and encoded
+    to PNG once, instead of round-tripping through bytes between
+    resize_image_if_needed and overlay_logo.
+    
+    Args:
+        background_image_bytes: Generated image bytes
+        logo_path: Path to the GNB logo image
+        max_dimension: Maximum width or height in pixels
+        
+    Returns:
+        Final PNG image bytes, or the original bytes if nothing changed
+        
+    Raises:
+        ImageProcessingError: If processing fails
+    """
+    try:
+        image = Image.open(io.BytesIO(background_image_bytes))
+        width, height = image.size
+        
+        resized = width > max_dimension or height > max_dimension
+        if resized:
+            new_size = _fit_dimensions(width, height, max_dimension)
+            image = image.resize(new_size, Image.Resampling.LANCZOS)
+            logger.info("Image resized", original_size=(width, height), new_size=new_size)
+        
+        logo = _load_logo(logo_path)
+        if logo is None and not resized:
+            return background_image_bytes
+        
+        if logo is not None:
+            if image.mode != 'RGBA':
+                image = image.convert('RGBA')
+            image = _paste_logo(image, logo)
+        
+        output_buffer = io.BytesIO()
+        image.save(output_buffer, format='PNG')
+        return output_buffer.getvalue()
+        
+    except Exception as e:
+        logger.error("Failed to process final image", error=str(e))
+        raise ImageProcessingError(f"Failed to process final image: {str(e)}")
@@ -1,11 +1,12 @@
 """Simple local storage service for development."""
 
 import os
-import uuid
-from datetime import datetime
+import threading
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Set, Tuple
 
+from services._uring_writer import submit_writes, write_file
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -14,6 +15,10 @@ logger = get_logger(__name__)
 class LocalStorageService:
     """Simple local file storage service."""
     
+    # Folders already created by this process, shared by all instances
+    _known_dirs: Set[Path] = set()
+    _known_dirs_lock = threading.Lock()
+    
     def __init__(self, base_path: str = "./storage"):
         """Initialize local storage."""
         self.base_path = Path(base_path)
@@ -25,6 +30,17 @@ class LocalStorageService:
         
         logger.info(f"🗂️ Local storage initialized at: {self.base_path.absolute()}")
     
+    def _ensure_day_folder(self, folder: str, ymd: Tuple[int, int, int]) -> Path:
+        """Return the date-based folder, creating it only the first time it is seen."""
+        year, month, day = ymd
+        folder_path = self.base_path / folder / f"{year}/{month:02d}/{day:02d}"
+        if folder_path not in self._known_dirs:
+            with self._known_dirs_lock:
+                if folder_path not in self._known_dirs:
+                    folder_path.mkdir(parents=True, exist_ok=True)
+                    self._known_dirs.add(folder_path)
+        return folder_path
+    
     def save_image(self, image_bytes: bytes, filename: str, folder: str = "generations") -> str:
         """
         Save image bytes to local storage.
@@ -38,23 +54,20 @@ class LocalStorageService:
             Relative file path as string
         """
         try:
-            # Create date-based folder structure
-            now = datetime.now()
-            date_folder = f"{now.year}/{now.month:02d}/{now.day:02d}"
-            folder_path = self.base_path / folder / date_folder
-            folder_path.mkdir(parents=True, exist_ok=True)
+            # Create date-based folder structure (cached per UTC day)
+            today = datetime.now(timezone.utc)
+            folder_path = self._ensure_day_folder(folder, (today.year, today.month, today.day))
             
             # Generate unique filename with proper extension
             file_extension = "png"  # Default
             if "." in filename:
                 file_extension = filename.split(".")[-1].lower()
             
-            unique_filename = f"{uuid.uuid4()}.{file_extension}"
+            unique_filename = f"{os.urandom(16).hex()}.{file_extension}"
             file_path = folder_path / unique_filename
             
             # Save the file
-            with open(file_path, "wb") as f:
-                f.write(image_bytes)
+            write_file(file_path, image_bytes)
             
             # Return relative path from storage root
             relative_path = str(file_path.relative_to(self.base_path))
@@ -66,6 +79,36 @@ class LocalStorageService:
             logger.error(f"❌ Failed to save image: {e}")
             raise Exception(f"Storage save failed: {str(e)}")
     
+    def save_images(self, items: List[Tuple[bytes, str, str]]) -> List[str]:
+        """
+        Save several images with one batched write submission.
+        
+        Args:
+            items: List of (image_bytes, filename, folder) tuples
+            
+        Returns:
+            Relative file paths as strings, in the same order as items
+        """
+        try:
+            today = datetime.now(timezone.utc)
+            ymd = (today.year, today.month, today.day)
+            
+            writes = []
+            for image_bytes, filename, folder in items:
+                folder_path = self._ensure_day_folder(folder, ymd)
+                file_extension = filename.split(".")[-1].lower() if "." in filename else "png"
+                writes.append((folder_path / f"{os.urandom(16).hex()}.{file_extension}", image_bytes))
+            
+            submit_writes(writes)
+            
+            relative_paths = [f"storage/{path.relative_to(self.base_path)}" for path, _ in writes]
+            logger.info(f"📁 Saved {len(relative_paths)} images in one batch")
+            return relative_paths
+            
+        except Exception as e:
+            logger.error(f"❌ Failed to save images: {e}")
+            raise Exception(f"Storage save failed: {str(e)}")
+    
     def get_full_path(self, relative_path: str) -> Path:
         """Get full file path from relative path."""
         # Remove 'storage/' prefix if present
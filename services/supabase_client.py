@@ -1,14 +1,18 @@
 """Supabase client service for direct database operations."""
 
 import os
-from typing import Optional, Dict, Any
-from datetime import datetime
+import asyncio
+from typing import Optional, Dict, Any, List, Tuple
 from supabase import create_client, Client
 from config.settings import settings
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Write batching: pending writes are flushed together after this window
+FLUSH_INTERVAL_SECONDS = 0.05
+MAX_BATCH_SIZE = 100
+
 
 class SupabaseClientService:
     """Service for direct Supabase database operations."""
@@ -16,6 +20,8 @@ class SupabaseClientService:
     def __init__(self):
         """Initialize Supabase client."""
         self.client: Optional[Client] = None
+        self._pending: Optional[asyncio.Queue] = None
+        self._flusher_task: Optional[asyncio.Task] = None
         self._initialize_client()
     
     def _initialize_client(self):
@@ -36,25 +42,21 @@ class SupabaseClientService:
             # Create client with minimal configuration
             self.client = create_client(supabase_url, supabase_key)
             logger.info("✅ Supabase client initialized successfully")
-            
-            # Test connection
-            if self._test_connection():
-                logger.info("✅ Supabase connection test successful")
-            else:
-                logger.warning("⚠️ Supabase connection test failed")
                 
         except Exception as e:
             logger.error(f"❌ Failed to initialize Supabase client: {e}")
             self.client = None
     
-    def _test_connection(self) -> bool:
-        """Test Supabase connection."""
+    async def healthcheck(self) -> bool:
+        """Check Supabase connectivity with a minimal query, off the event loop."""
         if not self.client:
             return False
             
         try:
             # Try to query image_generations table
-            response = self.client.table('image_generations').select("*").limit(1).execute()
+            await asyncio.to_thread(
+                lambda: self.client.table('image_generations').select("id").limit(1).execute()
+            )
             return True
         except Exception as e:
             logger.error(f"Supabase connection test failed: {e}")
@@ -64,6 +66,119 @@ class SupabaseClientService:
         """Check if Supabase client is available."""
         return self.client is not None
     
+    def _enqueue(self, kind: str, payload: Any) -> asyncio.Future:
+        """Queue a write for the background flusher and return its result future."""
+        loop = asyncio.get_running_loop()
+        if (self._flusher_task is None or self._flusher_task.done()
+                or self._flusher_task.get_loop() is not loop):
+            self._pending = asyncio.Queue()
+            self._flusher_task = loop.create_task(self._flusher())
+        
+        future = loop.create_future()
+        self._pending.put_nowait((kind, payload, future))
+        return future
+    
+    async def _flusher(self):
+        """Coalesce queued writes and send them to Supabase in batches."""
+        while True:
+            batch = [await self._pending.get()]
+            await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+            while len(batch) < MAX_BATCH_SIZE and not self._pending.empty():
+                batch.append(self._pending.get_nowait())
+            
+            try:
+                await self._flush_inserts([(p, f) for k, p, f in batch if k == "insert"])
+                await self._flush_updates([(p, f) for k, p, f in batch if k == "update"])
+            except Exception as e:
+                logger.error(f"❌ Supabase write batch failed: {e}")
+            finally:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+                    self._pending.task_done()
+    
+    async def close(self):
+        """Flush queued writes and stop the background flusher."""
+        task = self._flusher_task
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            return
+        
+        # Wait for everything already queued to be written, then stop the flusher
+        await self._pending.join()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        self._flusher_task = None
+    
+    async def _insert_rows(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert rows in one request and return the inserted records."""
+        response = await asyncio.to_thread(
+            lambda: self.client.table('image_generations').insert(rows).execute()
+        )
+        return response.data or []
+    
+    async def _flush_inserts(self, inserts: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        """Insert queued records, one request per distinct set of columns."""
+        # PostgREST bulk inserts require every row to have the same keys
+        groups: Dict[Tuple[str, ...], List[Tuple[Dict[str, Any], asyncio.Future]]] = {}
+        for record_data, future in inserts:
+            groups.setdefault(tuple(sorted(record_data)), []).append((record_data, future))
+        
+        for group in groups.values():
+            try:
+                rows = await self._insert_rows([r for r, _ in group])
+            except Exception as e:
+                if len(group) == 1:
+                    logger.error(f"❌ Error inserting Supabase record: {e}")
+                    rows = []
+                else:
+                    # One bad row fails the whole bulk insert, so isolate it and keep the rest
+                    logger.warning(f"⚠️ Batch insert failed, retrying {len(group)} record(s) individually: {e}")
+                    await self._insert_individually(group)
+                    continue
+            
+            for i, (_, future) in enumerate(group):
+                if not future.done():
+                    future.set_result(rows[i] if i < len(rows) else None)
+            if rows:
+                logger.info(f"✅ Inserted {len(rows)} Supabase record(s) in one batch")
+    
+    async def _insert_individually(self, group: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        """Insert records one request each, resolving only failed rows with None."""
+        results = await asyncio.gather(
+            *[self._insert_rows([record_data]) for record_data, _ in group],
+            return_exceptions=True
+        )
+        for (_, future), rows in zip(group, results):
+            if isinstance(rows, Exception):
+                logger.error(f"❌ Error inserting Supabase record: {rows}")
+                rows = None
+            if not future.done():
+                future.set_result(rows[0] if rows else None)
+    
+    async def _flush_updates(self, updates: List[Tuple[Tuple[str, Dict[str, Any]], asyncio.Future]]):
+        """Apply queued updates, merging multiple updates to the same record."""
+        merged: Dict[str, Tuple[Dict[str, Any], List[asyncio.Future]]] = {}
+        for (record_id, update_data), future in updates:
+            data, futures = merged.setdefault(record_id, ({}, []))
+            data.update(update_data)
+            futures.append(future)
+        
+        for record_id, (update_data, futures) in merged.items():
+            try:
+                response = await asyncio.to_thread(
+                    lambda: self.client.table('image_generations').update(update_data).eq('id', record_id).execute()
+                )
+                result = bool(response.data)
+            except Exception as e:
+                logger.error(f"❌ Error updating Supabase record: {e}")
+                result = False
+            for future in futures:
+                if not future.done():
+                    future.set_result(result)
+    
     async def insert_generation_record(self, 
                                      original_filename: str,
                                      original_url: Optional[str] = None,
@@ -84,29 +199,26 @@ class SupabaseClientService:
             return None
         
         try:
-            record_data = {
-                "original_image_filename": original_filename,
-                "original_image_url": original_url,
-                "original_image_size": original_size,
-                "original_image_format": original_format,
-                "generated_image_url": generated_url,
-                "generated_image_size": generated_size,
-                "prompt_used": prompt_used,
-                "dog_description": dog_description,
-                "status": status,
-                "processing_time": processing_time,
-                "logo_applied": logo_applied,
-                "error_message": error_message,
-                "created_at": datetime.now().isoformat()
-            }
+            # Build the payload in one pass, skipping None values;
+            # created_at is filled in by the column default
+            record_data = {k: v for k, v in (
+                ("original_image_filename", original_filename),
+                ("original_image_url", original_url),
+                ("original_image_size", original_size),
+                ("original_image_format", original_format),
+                ("generated_image_url", generated_url),
+                ("generated_image_size", generated_size),
+                ("prompt_used", prompt_used),
+                ("dog_description", dog_description),
+                ("status", status),
+                ("processing_time", processing_time),
+                ("logo_applied", logo_applied),
+                ("error_message", error_message),
+            ) if v is not None}
             
-            # Remove None values
-            record_data = {k: v for k, v in record_data.items() if v is not None}
+            inserted_record = await self._enqueue("insert", record_data)
             
-            response = self.client.table('image_generations').insert(record_data).execute()
-            
-            if response.data:
-                inserted_record = response.data[0]
+            if inserted_record:
                 logger.info(f"✅ Supabase record inserted successfully: ID {inserted_record['id']}")
                 return inserted_record
             else:
@@ -126,19 +238,17 @@ class SupabaseClientService:
             return False
         
         try:
-            update_data = {
-                "status": status,
-                "updated_at": datetime.now().isoformat()
-            }
+            # updated_at is maintained by the update_image_generations_updated_at trigger
+            update_data = {"status": status}
             
             if error_message:
                 update_data["error_message"] = error_message
             if processing_time is not None:
                 update_data["processing_time"] = processing_time
             
-            response = self.client.table('image_generations').update(update_data).eq('id', record_id).execute()
+            updated = await self._enqueue("update", (record_id, update_data))
             
-            if response.data:
+            if updated:
                 logger.info(f"✅ Supabase record updated: ID {record_id}")
                 return True
             else:
@@ -149,6 +259,67 @@ class SupabaseClientService:
             logger.error(f"❌ Error updating Supabase record: {e}")
             return False
     
+    async def update_generation_fields(self, record_id: str, update_data: Dict[str, Any]) -> bool:
+        """Update arbitrary columns of a generation record, e.g. its image URLs."""
+        
+        if not self.client:
+            return False
+        
+        try:
+            updated = await self._enqueue("update", (record_id, update_data))
+            
+            if updated:
+                logger.info(f"✅ Supabase record fields updated: ID {record_id}")
+                return True
+            else:
+                logger.error(f"❌ Failed to update Supabase record fields: ID {record_id}")
+                return False
+                
+        except Exception as e:
+            logger.error(f"❌ Error updating Supabase record fields: {e}")
+            return False
+    
+    async def list_generations(self, limit: int, offset: int = 0,
+                               status: Optional[str] = None) -> Optional[list]:
+        """List generation records, newest first; None if the query fails."""
+        
+        if not self.client:
+            return None
+        
+        def _query():
+            query = self.client.table('image_generations').select("*")
+            if status:
+                query = query.eq("status", status)
+            return query.order("created_at", desc=True).range(offset, offset + limit - 1).execute()
+        
+        try:
+            # supabase-py is synchronous, so run the request off the event loop
+            response = await asyncio.to_thread(_query)
+            return response.data or []
+        except Exception as e:
+            logger.error(f"❌ Error listing Supabase records: {e}")
+            return None
+    
+    async def count_generations_by_status(self, statuses: List[str]) -> Optional[Dict[str, int]]:
+        """Count generation records per status; None if any count fails."""
+        
+        if not self.client:
+            return None
+        
+        def _count(status: str) -> int:
+            # head=True asks PostgREST for the count only, without the rows
+            response = self.client.table('image_generations').select(
+                "id", count="exact", head=True
+            ).eq("status", status).execute()
+            return response.count or 0
+        
+        try:
+            counts = await asyncio.gather(*[asyncio.to_thread(_count, status) for status in statuses])
+            return dict(zip(statuses, counts))
+        except Exception as e:
+            logger.error(f"❌ Error counting Supabase records: {e}")
+            return None
+    
     async def get_generation_statistics(self, limit: int = 5) -> Optional[list]:
         """Get generation statistics from daily summary view."""
         
@@ -156,7 +327,10 @@ class SupabaseClientService:
             return None
         
         try:
-            response = self.client.table('daily_generation_summary').select("*").limit(limit).execute()
+            # supabase-py is synchronous, so run the request off the event loop
+            response = await asyncio.to_thread(
+                lambda: self.client.table('daily_generation_summary').select("*").limit(limit).execute()
+            )
             
             if response.data:
                 logger.info(f"✅ Retrieved {len(response.data)} statistics records")
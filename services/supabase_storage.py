@@ -1,18 +1,83 @@
 """Supabase Storage service for managing image uploads and downloads."""
 
-import uuid
+import asyncio
+import functools
+import itertools
+import os
+import secrets
 import io
-from typing import Optional, Tuple
-from datetime import datetime, timedelta
-from supabase import create_client, Client
-from PIL import Image
+from typing import Any, AsyncIterator, BinaryIO, List, Optional, Tuple, Union
+from datetime import datetime, timezone
+import httpx
+import orjson
 
 from config.settings import settings
-from utils.exceptions import ImageProcessingError, AzureAPIError
+from utils.exceptions import ImageProcessingError
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Image payloads accepted by upload_image
+ImageSource = Union[bytes, memoryview, BinaryIO]
+
+# Content type for orjson-encoded request bodies
+_JSON_CONTENT_TYPE = {"Content-Type": "application/json"}
+
+# Leading signature bytes of the image formats accepted for upload
+_IMAGE_PREFIXES = (b"\x89PNG\r\n\x1a\n", b"\xff\xd8\xff")
+
+# Chunk size for streaming memoryview and file-like upload bodies
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Chunk size for streaming download bodies into a caller-supplied sink
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def _content_length(source: ImageSource) -> Optional[int]:
+    """Return the number of bytes left to send from source, if it can be known cheaply."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return memoryview(source).nbytes
+    try:
+        return os.fstat(source.fileno()).st_size - source.tell()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        pass
+    if hasattr(source, "getbuffer"):
+        with source.getbuffer() as buffer:
+            return buffer.nbytes - source.tell()
+    return None
+
+
+async def _iter_chunks(source: Union[memoryview, BinaryIO]) -> AsyncIterator[bytes]:
+    """Yield an upload body in fixed-size chunks straight from its source buffer."""
+    if isinstance(source, memoryview):
+        for start in range(0, source.nbytes, UPLOAD_CHUNK_SIZE):
+            yield source[start:start + UPLOAD_CHUNK_SIZE].tobytes()
+        return
+    while chunk := source.read(UPLOAD_CHUNK_SIZE):
+        yield chunk
+
+
+def storage_op(name: str, fallback: Any = ...):
+    """
+    Wrap a storage coroutine with the shared log-and-raise error path.
+    
+    Any exception is logged and re-raised as ImageProcessingError("<name> failed: ..."),
+    or swallowed with fallback returned instead when one is given.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                logger.error(f"{name} failed", error=str(e))
+                if fallback is not ...:
+                    return fallback
+                raise ImageProcessingError(f"{name} failed: {str(e)}")
+        return wrapper
+    return decorator
+
+
 class SupabaseStorageService:
     """Service for managing image storage in Supabase Storage."""
     
@@ -21,65 +86,174 @@ class SupabaseStorageService:
         if not settings.supabase_enabled:
             raise ValueError("Supabase credentials not configured")
         
-        self.supabase_url = settings.supabase_url
+        self.supabase_url = settings.supabase_url.rstrip("/")
         self.supabase_key = settings.supabase_service_role_key or settings.supabase_anon_key
         self.bucket_name = "images"  # User created "images" bucket
         
-        # Initialize Supabase client
-        self.client: Client = create_client(self.supabase_url, self.supabase_key)
+        # Object paths for this bucket, relative to the storage API base URL
+        self._obj_base = f"/object/{self.bucket_name}"
+        self._sign_base = f"/object/sign/{self.bucket_name}"
+        self._list_path = f"/object/list/{self.bucket_name}"
+        self._public_base = f"{self.supabase_url}/storage/v1/object/public/{self.bucket_name}"
+        
+        # Async HTTP client for the Storage REST API, so uploads don't block the event loop
+        # Auth headers are set once on the client and merged into every request
+        self._client = httpx.AsyncClient(
+            base_url=f"{self.supabase_url}/storage/v1",
+            headers={
+                "apikey": self.supabase_key,
+                "Authorization": f"Bearer {self.supabase_key}"
+            },
+            limits=httpx.Limits(max_connections=30, max_keepalive_connections=20, keepalive_expiry=30.0),
+            timeout=httpx.Timeout(connect=5, read=10, write=10, pool=5),
+            http2=True,
+            transport=httpx.AsyncHTTPTransport(retries=1, http2=True)
+        )
         
-        logger.info(f"Supabase Storage service initialized for bucket: {self.bucket_name}")
+        # Caps concurrent uploads issued by upload_images
+        self._upload_sema = asyncio.Semaphore(10)
+        
+        logger.info("Supabase Storage service initialized", bucket=self.bucket_name)
+    
+    async def warm_up(self) -> None:
+        """Open a pooled connection (TLS + HTTP/2 negotiation) ahead of the first upload."""
+        try:
+            await self._client.head(f"/bucket/{self.bucket_name}")
+            logger.info("Supabase Storage connection warmed up")
+        except Exception as e:
+            logger.warning("Supabase Storage warm-up failed", error=str(e))
+    
+    async def close(self) -> None:
+        """Close the pooled HTTP client."""
+        await self._client.aclose()
     
+    @storage_op("Storage upload")
     async def upload_image(
         self,
-        image_bytes: bytes,
+        image_bytes: ImageSource,
         filename: str,
         folder: str = "generations",
-        content_type: str = "image/png"
+        content_type: str = "image/png",
+        date_prefix: Optional[str] = None,
+        file_token: Optional[str] = None
     ) -> Tuple[str, str]:
         """
         Upload image to Supabase Storage.
         
+        Memoryviews and file-like objects are streamed to the socket in chunks
+        rather than being copied into one request body first.
+        
         Args:
-            image_bytes: Image data as bytes
+            image_bytes: Image data as bytes, a memoryview or a binary file object
             filename: Original filename
             folder: Storage folder (e.g., 'originals', 'generations')
             content_type: MIME type of the image
+            date_prefix: Precomputed 'YYYY/MM/DD' folder (defaults to today, UTC)
+            file_token: Precomputed 32-hex-character file name (defaults to a fresh token)
             
         Returns:
             Tuple of (file_path, public_url)
         """
-        try:
-            # Generate unique filename
-            file_extension = filename.split('.')[-1] if '.' in filename else 'png'
-            unique_filename = f"{uuid.uuid4()}.{file_extension}"
-            file_path = f"{folder}/{datetime.utcnow().strftime('%Y/%m/%d')}/{unique_filename}"
-            
-            logger.info(f"Uploading image to Supabase Storage: {file_path}")
-            
-            # Upload file to Supabase Storage
-            response = self.client.storage.from_(self.bucket_name).upload(
-                path=file_path,
-                file=image_bytes,
-                file_options={
-                    "content-type": content_type,
-                    "cache-control": "3600"
-                }
-            )
-            
-            # Modern supabase handles response differently
-            logger.info(f"Upload response type: {type(response)}")
-            
-            # Get public URL
-            public_url = self.client.storage.from_(self.bucket_name).get_public_url(file_path)
+        # Generate unique filename
+        file_extension = filename.split('.')[-1] if '.' in filename else 'png'
+        date_prefix = date_prefix or datetime.now(timezone.utc).strftime('%Y/%m/%d')
+        file_token = file_token or secrets.token_hex(16)
+        file_path = f"{folder}/{date_prefix}/{file_token}.{file_extension}"
+        
+        logger.info("Uploading image to Supabase Storage", file_path=file_path)
+        
+        headers = {
+            "Content-Type": content_type,
+            "Cache-Control": "max-age=3600"
+        }
+        if isinstance(image_bytes, bytes):
+            content = image_bytes
+        else:
+            content = _iter_chunks(image_bytes)
+            content_length = _content_length(image_bytes)
+            if content_length is not None:
+                headers["Content-Length"] = str(content_length)
+        
+        # Upload file to Supabase Storage
+        response = await self._client.post(
+            f"{self._obj_base}/{file_path}",
+            content=content,
+            headers=headers
+        )
+        response.raise_for_status()
+        
+        # Get public URL
+        public_url = f"{self._public_base}/{file_path}"
+        
+        logger.info("Image uploaded successfully", public_url=public_url)
+        
+        return file_path, public_url
+    
+    async def upload_images(
+        self,
+        items: List[Tuple[ImageSource, str, str, str]]
+    ) -> List[Optional[Tuple[str, str]]]:
+        """
+        Upload several images concurrently.
+        
+        Uploads share the pooled HTTP/2 connection, so a batch costs roughly
+        one round trip instead of one per file. A failed upload does not
+        affect the others; it is logged and reported as None.
+        
+        Args:
+            items: List of (image_bytes, filename, folder, content_type) tuples
             
-            logger.info(f"Image uploaded successfully to: {public_url}")
+        Returns:
+            List of (file_path, public_url) tuples, or None for uploads that
+            failed, in the same order as items
+        """
+        # Date folder and file names are drawn once for the whole batch
+        date_prefix = datetime.now(timezone.utc).strftime('%Y/%m/%d')
+        tokens = secrets.token_hex(16 * len(items))
+        
+        async def _one(index: int, item: Tuple[ImageSource, str, str, str]) -> Optional[Tuple[str, str]]:
+            async with self._upload_sema:
+                try:
+                    return await self.upload_image(
+                        *item,
+                        date_prefix=date_prefix,
+                        file_token=tokens[index * 32:(index + 1) * 32]
+                    )
+                except ImageProcessingError:
+                    # Already logged by storage_op
+                    return None
+        
+        return await asyncio.gather(*[_one(i, item) for i, item in enumerate(items)])
+    
+    @storage_op("Storage download")
+    async def download_image_stream(self, file_path: str, sink: BinaryIO) -> int:
+        """
+        Stream an image from Supabase Storage into a writable binary sink.
+        
+        The body is copied in DOWNLOAD_CHUNK_SIZE pieces, so only one chunk is
+        held in memory per download regardless of the image size.
+        
+        Args:
+            file_path: Path to the file in storage
+            sink: Writable binary file object receiving the image data
             
-            return file_path, public_url
+        Returns:
+            Position of the sink after the last write
+        """
+        logger.info("Downloading image from Supabase Storage", file_path=file_path)
+        
+        # Stream file from Supabase Storage
+        async with self._client.stream("GET", f"{self._obj_base}/{file_path}") as response:
+            if response.is_error:
+                await response.aread()
+                raise ImageProcessingError(
+                    f"Failed to download image from Supabase Storage: {response.text}"
+                )
             
-        except Exception as e:
-            logger.error(f"Error uploading image to Supabase Storage: {e}")
-            raise ImageProcessingError(f"Storage upload failed: {str(e)}")
+            async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                sink.write(chunk)
+        
+        return sink.tell()
     
     async def download_image(self, file_path: str) -> bytes:
         """
@@ -91,23 +265,11 @@ class SupabaseStorageService:
         Returns:
             Image data as bytes
         """
-        try:
-            logger.info(f"Downloading image from Supabase Storage: {file_path}")
-            
-            # Download file from Supabase Storage
-            response = self.client.storage.from_(self.bucket_name).download(file_path)
-            
-            if isinstance(response, dict) and response.get('error'):
-                raise ImageProcessingError(
-                    f"Failed to download image from Supabase Storage: {response['error']}"
-                )
-            
-            return response
-            
-        except Exception as e:
-            logger.error(f"Error downloading image from Supabase Storage: {e}")
-            raise ImageProcessingError(f"Storage download failed: {str(e)}")
+        buffer = io.BytesIO()
+        await self.download_image_stream(file_path, buffer)
+        return buffer.getvalue()
     
+    @storage_op("Storage delete", fallback=False)
     async def delete_image(self, file_path: str) -> bool:
         """
         Delete image from Supabase Storage.
@@ -118,23 +280,24 @@ class SupabaseStorageService:
         Returns:
             True if deletion was successful
         """
-        try:
-            logger.info(f"Deleting image from Supabase Storage: {file_path}")
-            
-            # Delete file from Supabase Storage
-            response = self.client.storage.from_(self.bucket_name).remove([file_path])
-            
-            if response.get('error'):
-                logger.warning(f"Failed to delete image: {response['error']}")
-                return False
-            
-            logger.info(f"Image deleted successfully: {file_path}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error deleting image from Supabase Storage: {e}")
+        logger.info("Deleting image from Supabase Storage", file_path=file_path)
+        
+        # Delete file from Supabase Storage
+        response = await self._client.request(
+            "DELETE",
+            self._obj_base,
+            content=orjson.dumps({"prefixes": [file_path]}),
+            headers=_JSON_CONTENT_TYPE
+        )
+        
+        if response.is_error:
+            logger.warning("Failed to delete image", file_path=file_path, error=response.text)
             return False
+        
+        logger.info("Image deleted successfully", file_path=file_path)
+        return True
     
+    @storage_op("Signed URL generation")
     async def generate_signed_url(
         self,
         file_path: str,
@@ -150,29 +313,27 @@ class SupabaseStorageService:
         Returns:
             Signed URL for file access
         """
-        try:
-            logger.info(f"Generating signed URL for: {file_path}")
-            
-            # Create signed URL
-            response = self.client.storage.from_(self.bucket_name).create_signed_url(
-                path=file_path,
-                expires_in=expires_in
+        logger.info("Generating signed URL", file_path=file_path)
+        
+        # Create signed URL
+        response = await self._client.post(
+            f"{self._sign_base}/{file_path}",
+            content=orjson.dumps({"expiresIn": expires_in}),
+            headers=_JSON_CONTENT_TYPE
+        )
+        
+        if response.is_error:
+            raise ImageProcessingError(
+                f"Failed to generate signed URL: {response.text}"
             )
-            
-            if response.get('error'):
-                raise ImageProcessingError(
-                    f"Failed to generate signed URL: {response['error']}"
-                )
-            
-            signed_url = response.get('signedURL')
-            logger.info(f"Signed URL generated successfully")
-            
-            return signed_url
-            
-        except Exception as e:
-            logger.error(f"Error generating signed URL: {e}")
-            raise ImageProcessingError(f"Signed URL generation failed: {str(e)}")
+        
+        # The API returns a path relative to the storage endpoint
+        signed_url = f"{self.supabase_url}/storage/v1{orjson.loads(response.content)['signedURL']}"
+        logger.info("Signed URL generated successfully")
+        
+        return signed_url
     
+    @storage_op("File listing")
     async def list_files(
         self,
         folder: str = "",
@@ -190,26 +351,26 @@ class SupabaseStorageService:
         Returns:
             List of file objects
         """
-        try:
-            logger.info(f"Listing files in folder: {folder}")
-            
-            # List files in bucket
-            response = self.client.storage.from_(self.bucket_name).list(
-                path=folder,
-                limit=limit,
-                offset=offset
+        logger.info("Listing files", folder=folder)
+        
+        # List files in bucket
+        response = await self._client.post(
+            self._list_path,
+            content=orjson.dumps({
+                "prefix": folder,
+                "limit": limit,
+                "offset": offset,
+                "sortBy": {"column": "name", "order": "asc"}
+            }),
+            headers=_JSON_CONTENT_TYPE
+        )
+        
+        if response.is_error:
+            raise ImageProcessingError(
+                f"Failed to list files: {response.text}"
             )
-            
-            if isinstance(response, dict) and response.get('error'):
-                raise ImageProcessingError(
-                    f"Failed to list files: {response['error']}"
-                )
-            
-            return response
-            
-        except Exception as e:
-            logger.error(f"Error listing files: {e}")
-            raise ImageProcessingError(f"File listing failed: {str(e)}")
+        
+        return orjson.loads(response.content)
     
     async def get_storage_statistics(self) -> dict:
         """
@@ -221,53 +382,71 @@ class SupabaseStorageService:
         try:
             # Get bucket info (this might not be available in all Supabase plans)
             # For now, return basic stats
-            originals = await self.list_files("originals")
-            generations = await self.list_files("generations")
+            originals, generations = await asyncio.gather(
+                self.list_files("originals"),
+                self.list_files("generations")
+            )
             
-            total_files = len(originals) + len(generations)
+            original_count, generated_count = len(originals), len(generations)
+            total_files = original_count + generated_count
             
-            # Calculate approximate storage size
-            total_size = 0
-            for file_list in [originals, generations]:
-                for file_obj in file_list:
-                    if isinstance(file_obj, dict) and 'metadata' in file_obj:
-                        total_size += file_obj['metadata'].get('size', 0)
+            # Calculate approximate storage size in a single pass; list_files pages
+            # at 100 objects per folder, too few for a vectorised reduction to pay off
+            total_size = sum(
+                file_obj['metadata'].get('size', 0)
+                for file_obj in itertools.chain(originals, generations)
+                if isinstance(file_obj, dict) and file_obj.get('metadata')
+            )
             
             return {
                 "bucket_name": self.bucket_name,
                 "total_files": total_files,
-                "original_images": len(originals),
-                "generated_images": len(generations),
+                "original_images": original_count,
+                "generated_images": generated_count,
                 "total_size_bytes": total_size,
                 "total_size_mb": round(total_size / (1024 * 1024), 2),
                 "provider": "supabase"
             }
             
         except Exception as e:
-            logger.error(f"Error getting storage statistics: {e}")
+            logger.error("Error getting storage statistics", error=str(e))
             return {
                 "bucket_name": self.bucket_name,
                 "error": str(e),
                 "provider": "supabase"
             }
     
-    def _validate_image(self, image_bytes: bytes) -> bool:
+    def _validate_image(self, image_bytes: bytes, deep: bool = False) -> bool:
         """
         Validate image format and content.
         
+        By default only the PNG, JPEG or WebP signature is checked, which is
+        enough to gate uploads; deep=True decodes the image with PIL.
+        
         Args:
             image_bytes: Image data to validate
+            deep: Fully parse the image instead of sniffing its header
             
         Returns:
             True if image is valid
         """
+        if not deep:
+            head = bytes(memoryview(image_bytes)[:12])
+            # WebP's signature is split around the RIFF chunk size, so it can't be a prefix
+            return head.startswith(_IMAGE_PREFIXES) or (
+                head[:4] == b"RIFF" and head[8:12] == b"WEBP"
+            )
+        
+        # PIL is only needed for deep validation, so keep it off the import path
+        from PIL import Image
+        
         try:
             # Try to open image with PIL
             image = Image.open(io.BytesIO(image_bytes))
             image.verify()
             return True
         except Exception as e:
-            logger.warning(f"Image validation failed: {e}")
+            logger.warning("Image validation failed", error=str(e))
             return False
 
 # Initialize storage service
@@ -277,5 +456,5 @@ if settings.supabase_enabled:
         storage_service = SupabaseStorageService()
         logger.info("✅ Supabase Storage service initialized successfully")
     except Exception as e:
-        logger.error(f"❌ Failed to initialize Supabase Storage service: {e}")
+        logger.error("❌ Failed to initialize Supabase Storage service", error=str(e))
         storage_service = None 
\ No newline at end of file
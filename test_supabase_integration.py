@@ -22,26 +22,19 @@ def create_supabase_client():
         return None
 
 def test_connection(supabase: Client):
-    """Bağlantı testi yap"""
+    """Bağlantı ve image_generations tablosu testi yap"""
     try:
-        # image_generations tablosu ile bağlantıyı test et
-        response = supabase.table('image_generations').select("*").limit(1).execute()
-        print("✅ Supabase bağlantısı başarılı")
+        # Satır döndürmeyen COUNT sorgusu: başarılıysa hem bağlantı hem tablo mevcut
+        probe = supabase.table('image_generations').select("id", count="exact").limit(0).execute()
+        if probe.count is None:
+            print("❌ image_generations tablosu bulunamadı")
+            return False
+        print(f"✅ Supabase bağlantısı başarılı, image_generations tablosu mevcut ({probe.count} kayıt)")
         return True
     except Exception as e:
         print(f"❌ Bağlantı testi başarısız: {e}")
         return False
 
-def check_image_generations_table(supabase: Client):
-    """image_generations tablosunun var olup olmadığını kontrol et"""
-    try:
-        response = supabase.table('image_generations').select("*").limit(1).execute()
-        print("✅ image_generations tablosu mevcut")
-        return True
-    except Exception as e:
-        print(f"❌ image_generations tablosu bulunamadı: {e}")
-        return False
-
 def insert_test_record(supabase: Client):
     """Test kaydı ekle - image_generations tablosuna"""
     try:
@@ -157,27 +150,23 @@ def main():
     if not supabase:
         return
     
-    # 3. Bağlantı testi
+    # 3. Bağlantı ve tablo testi
     if not test_connection(supabase):
         return
     
-    # 4. Tablo kontrolü
-    if not check_image_generations_table(supabase):
-        return
-    
-    # 5. Test kaydı ekle
+    # 4. Test kaydı ekle
     print("\n📝 Test kaydı ekleniyor...")
     new_record = insert_test_record(supabase)
     
-    # 6. Kayıtları getir
+    # 5. Kayıtları getir
     print("\n📋 Son kayıtlar getiriliyor...")
     records = fetch_records(supabase)
     
-    # 7. İstatistikleri getir
+    # 6. İstatistikleri getir
     print("\n📊 İstatistikler getiriliyor...")
     stats = get_statistics(supabase)
     
-    # 8. Backend entegrasyonunu test et
+    # 7. Backend entegrasyonunu test et
     test_backend_integration()
     
     print("\n✅ Test tamamlandı!")
@@ -2,14 +2,19 @@
 
 import pytest
 import io
+import struct
+import tempfile
 from PIL import Image
 from fastapi import UploadFile
 
 from services.image_processing import (
     validate_and_process_image,
     convert_image_to_base64,
+    convert_image_to_base64_bytes,
+    convert_image_to_base64_from_image,
     overlay_logo,
-    resize_image_if_needed
+    resize_image_if_needed,
+    process_final_image
 )
 from utils.exceptions import (
     FileSizeExceededError,
@@ -18,6 +23,34 @@ from utils.exceptions import (
     LogoOverlayError
 )
 
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+_PNG_COLOR_TYPE_RGBA = 6
+
+
+def _png_size(data: bytes) -> tuple:
+    """Read (width, height) from a PNG's IHDR chunk without decoding pixels."""
+    assert data.startswith(_PNG_SIGNATURE)
+    return struct.unpack('>II', data[16:24])
+
+
+def _png_color_type(data: bytes) -> int:
+    """Read the IHDR colour type byte (6 = RGBA) from a PNG."""
+    assert data.startswith(_PNG_SIGNATURE)
+    return data[25]
+
+
+def _jpeg_size(data: bytes) -> tuple:
+    """Read (width, height) from the first SOF segment of a JPEG."""
+    assert data[:2] == b'\xff\xd8'
+    offset = 2
+    while offset < len(data):
+        marker, length = data[offset + 1], struct.unpack('>H', data[offset + 2:offset + 4])[0]
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack('>HH', data[offset + 5:offset + 9])
+            return width, height
+        offset += 2 + length
+    raise AssertionError("No SOF segment found in JPEG data")
+
 
 class TestImageValidation:
     """Tests for image validation and processing."""
@@ -42,8 +75,29 @@ class TestImageValidation:
         assert len(result) > 0
         
         # Verify it's a valid image
-        img = Image.open(io.BytesIO(result))
-        assert img.size == (512, 512)
+        assert _jpeg_size(result) == (512, 512)
+    
+    @pytest.mark.asyncio
+    async def test_validate_spooled_image(self, sample_dog_image: bytes):
+        """Test validation of an upload that was spooled to disk."""
+        spool = tempfile.SpooledTemporaryFile(max_size=1024)
+        spool.write(sample_dog_image)
+        spool.seek(0)
+        assert spool._rolled
+        
+        file = UploadFile(
+            filename="test_dog.jpg",
+            file=spool,
+            headers={"content-type": "image/jpeg"}
+        )
+        
+        result = await validate_and_process_image(
+            file=file,
+            max_size_mb=10,
+            allowed_types=["image/jpeg", "image/png"]
+        )
+        
+        assert result == sample_dog_image
     
     @pytest.mark.asyncio
     async def test_validate_image_too_large(self, sample_large_image: bytes):
@@ -111,6 +165,23 @@ class TestImageConversion:
         assert result.startswith("data:image/jpeg;base64,")
         assert len(result) > len("data:image/jpeg;base64,")
     
+    def test_convert_to_base64_bytes(self, sample_dog_image: bytes):
+        """Test that the bytes variant matches the string data URI."""
+        result = convert_image_to_base64_bytes(sample_dog_image, "PNG")
+        
+        assert isinstance(result, bytes)
+        assert result.decode('ascii') == convert_image_to_base64(sample_dog_image, "PNG")
+    
+    def test_convert_to_base64_from_image(self, tiny_png_bytes: bytes):
+        """Test encoding a PIL image straight to a data URI."""
+        image = Image.open(io.BytesIO(tiny_png_bytes))
+        
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        expected = convert_image_to_base64(buffer.getvalue(), "PNG")
+        
+        assert convert_image_to_base64_from_image(image, "PNG") == expected
+    
     def test_convert_empty_image(self):
         """Test conversion with empty image data."""
         # Empty bytes should create a valid base64 string, not raise an error
@@ -124,14 +195,11 @@ class TestLogoOverlay:
     
     def test_overlay_logo_success(self, sample_dog_image: bytes, temp_logo_file: str):
         """Test successful logo overlay."""
-        result = overlay_logo(sample_dog_image, temp_logo_file)
-        
-        assert isinstance(result, bytes)
-        assert len(result) > 0
+        result = overlay_logo(sample_dog_image, temp_logo_file, _return_image=True)
         
-        # Verify the result is a valid image
-        img = Image.open(io.BytesIO(result))
-        assert img.mode == 'RGBA'
+        # Composited in memory, no PNG encode/decode round trip
+        assert result.mode == 'RGBA'
+        assert result.size == (512, 512)
     
     def test_overlay_logo_missing_file(self, sample_dog_image: bytes):
         """Test logo overlay with missing logo file."""
@@ -146,23 +214,45 @@ class TestLogoOverlay:
             overlay_logo(b"invalid image data", temp_logo_file)
 
 
+class TestFinalImageProcessing:
+    """Tests for the fused resize + logo overlay pipeline."""
+    
+    def test_process_final_image_resizes_and_overlays(self, large_rgb_png_bytes: bytes, temp_logo_file: str):
+        """Test that a large image is resized and gets the logo in one pass."""
+        result = process_final_image(large_rgb_png_bytes, temp_logo_file, max_dimension=1024)
+        
+        assert _png_size(result) == (1024, 768)
+        assert _png_color_type(result) == _PNG_COLOR_TYPE_RGBA
+    
+    def test_process_final_image_missing_logo(self, sample_dog_image: bytes):
+        """Test that small images without a logo are returned unchanged."""
+        result = process_final_image(sample_dog_image, "nonexistent_logo.png")
+        
+        assert result == sample_dog_image
+    
+    def test_process_final_image_invalid(self, temp_logo_file: str):
+        """Test processing with invalid image data."""
+        with pytest.raises(ImageProcessingError):
+            process_final_image(b"invalid image data", temp_logo_file)
+
+
 class TestImageResizing:
     """Tests for image resizing functionality."""
     
-    def test_resize_large_image(self):
+    def test_resize_large_image(self, large_rgb_png_bytes: bytes):
         """Test resizing a large image."""
-        # Create a large image
-        large_img = Image.new('RGB', (2048, 1536), color='blue')
-        img_buffer = io.BytesIO()
-        large_img.save(img_buffer, format='PNG')
-        large_img_bytes = img_buffer.getvalue()
-        
-        result = resize_image_if_needed(large_img_bytes, max_dimension=1024)
+        result = resize_image_if_needed(large_rgb_png_bytes, max_dimension=1024)
         
         # Check that image was resized
-        resized_img = Image.open(io.BytesIO(result))
-        assert max(resized_img.size) == 1024
-        assert resized_img.size == (1024, 768)  # Maintaining aspect ratio
+        resized_size = _png_size(result)
+        assert max(resized_size) == 1024
+        assert resized_size == (1024, 768)  # Maintaining aspect ratio
+    
+    def test_resize_large_jpeg_image(self, large_rgb_jpeg_bytes: bytes):
+        """Test resizing a large JPEG, which is decoded at reduced scale first."""
+        result = resize_image_if_needed(large_rgb_jpeg_bytes, max_dimension=1024)
+        
+        assert _jpeg_size(result) == (1024, 768)
     
     def test_resize_small_image(self, sample_dog_image: bytes):
         """Test that small images are not resized."""
@@ -171,32 +261,19 @@ class TestImageResizing:
         # Should return original image data
         assert result == sample_dog_image
     
-    def test_resize_square_image(self):
+    def test_resize_square_image(self, square_png_bytes: bytes):
         """Test resizing a square image."""
-        # Create a square image larger than max dimension
-        square_img = Image.new('RGB', (1500, 1500), color='red')
-        img_buffer = io.BytesIO()
-        square_img.save(img_buffer, format='PNG')
-        square_img_bytes = img_buffer.getvalue()
-        
-        result = resize_image_if_needed(square_img_bytes, max_dimension=1000)
+        result = resize_image_if_needed(square_png_bytes, max_dimension=1000)
         
-        resized_img = Image.open(io.BytesIO(result))
-        assert resized_img.size == (1000, 1000)
+        assert _png_size(result) == (1000, 1000)
     
-    def test_resize_portrait_image(self):
+    def test_resize_portrait_image(self, portrait_png_bytes: bytes):
         """Test resizing a portrait orientation image."""
-        # Create a portrait image
-        portrait_img = Image.new('RGB', (800, 1200), color='green')
-        img_buffer = io.BytesIO()
-        portrait_img.save(img_buffer, format='PNG')
-        portrait_img_bytes = img_buffer.getvalue()
-        
-        result = resize_image_if_needed(portrait_img_bytes, max_dimension=1000)
+        result = resize_image_if_needed(portrait_png_bytes, max_dimension=1000)
         
-        resized_img = Image.open(io.BytesIO(result))
-        assert resized_img.size[1] == 1000  # Height should be max dimension
-        assert resized_img.size[0] < 1000    # Width should be proportionally smaller
+        width, height = _png_size(result)
+        assert height == 1000  # Height should be max dimension
+        assert width < 1000    # Width should be proportionally smaller
     
     def test_resize_invalid_image(self):
         """Test resizing with invalid image data."""
@@ -212,13 +289,9 @@ class TestImageFormats:
         ("PNG", "RGBA"),
         ("WebP", "RGB")
     ])
-    def test_different_formats(self, format: str, color_mode: str, temp_logo_file: str):
+    def test_different_formats(self, format: str, color_mode: str, format_sample_images: dict, temp_logo_file: str):
         """Test processing different image formats."""
-        # Create image in specified format
-        img = Image.new(color_mode, (500, 500), color='purple')
-        img_buffer = io.BytesIO()
-        img.save(img_buffer, format=format)
-        img_bytes = img_buffer.getvalue()
+        img_bytes = format_sample_images[(format, color_mode)]
         
         # Test resizing
         resized = resize_image_if_needed(img_bytes, max_dimension=1024)
@@ -237,31 +310,21 @@ class TestImageFormats:
 class TestEdgeCases:
     """Tests for edge cases and error conditions."""
     
-    def test_very_small_image(self):
+    def test_very_small_image(self, tiny_png_bytes: bytes):
         """Test processing a very small image."""
-        tiny_img = Image.new('RGB', (10, 10), color='yellow')
-        img_buffer = io.BytesIO()
-        tiny_img.save(img_buffer, format='PNG')
-        tiny_img_bytes = img_buffer.getvalue()
-        
         # Should not be resized
-        result = resize_image_if_needed(tiny_img_bytes, max_dimension=1024)
-        assert result == tiny_img_bytes
+        result = resize_image_if_needed(tiny_png_bytes, max_dimension=1024)
+        assert result == tiny_png_bytes
         
         # Should convert to base64 successfully
         b64_result = convert_image_to_base64(result, "PNG")
         assert b64_result.startswith("data:image/png;base64,")
     
-    def test_extreme_aspect_ratio(self):
+    def test_extreme_aspect_ratio(self, wide_png_bytes: bytes):
         """Test image with extreme aspect ratio."""
         # Very wide image
-        wide_img = Image.new('RGB', (3000, 100), color='cyan')
-        img_buffer = io.BytesIO()
-        wide_img.save(img_buffer, format='PNG')
-        wide_img_bytes = img_buffer.getvalue()
-        
-        result = resize_image_if_needed(wide_img_bytes, max_dimension=1000)
+        result = resize_image_if_needed(wide_png_bytes, max_dimension=1000)
         
-        resized_img = Image.open(io.BytesIO(result))
-        assert resized_img.size[0] == 1000  # Width should be max dimension
-        assert resized_img.size[1] < 100     # Height should be proportionally smaller
\ No newline at end of file
+        width, height = _png_size(result)
+        assert width == 1000  # Width should be max dimension
+        assert height < 100     # Height should be proportionally smaller
\ No newline at end of file
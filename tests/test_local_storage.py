@@ -0,0 +1,112 @@
+"""Tests for local storage batched writes."""
+
+import os
+import pytest
+
+from services import _uring_writer
+from services._uring_writer import _write_remaining, submit_writes
+from services.local_storage import LocalStorageService
+
+
+requires_io_uring = pytest.mark.skipif(
+    _uring_writer.liburing is None or _uring_writer._thread_ring() is None,
+    reason="io_uring is not available"
+)
+
+
+def _payloads(tmp_path, count, size=4096):
+    return [(tmp_path / f"file_{i}.bin", os.urandom(size)) for i in range(count)]
+
+
+class TestSubmitWrites:
+    """Test cases for the io_uring and fallback write paths."""
+
+    @requires_io_uring
+    def test_io_uring_writes_all_files(self, tmp_path):
+        """Test that a batch written through io_uring lands intact."""
+        writes = _payloads(tmp_path, 5)
+        submit_writes(writes)
+
+        for path, data in writes:
+            assert path.read_bytes() == data
+
+    @requires_io_uring
+    def test_ring_reused_across_calls(self, tmp_path):
+        """Test that the calling thread's ring is set up once and reused."""
+        submit_writes(_payloads(tmp_path, 2))
+        ring = _uring_writer._thread_state.ring
+        submit_writes(_payloads(tmp_path, 3))
+
+        assert _uring_writer._thread_state.ring is ring
+
+    @requires_io_uring
+    def test_batch_larger_than_ring(self, tmp_path):
+        """Test that batches larger than the ring are split across submissions."""
+        writes = _payloads(tmp_path, _uring_writer.RING_ENTRIES + 5, size=64)
+        submit_writes(writes)
+
+        for path, data in writes:
+            assert path.read_bytes() == data
+
+    @requires_io_uring
+    def test_open_failure_leaves_ring_usable(self, tmp_path):
+        """Test that a failed open raises and does not leave stale entries on the ring."""
+        writes = _payloads(tmp_path, 2) + [(tmp_path / "missing" / "x.bin", b"x")]
+        with pytest.raises(OSError):
+            submit_writes(writes)
+
+        writes = _payloads(tmp_path, 3)
+        submit_writes(writes)
+        for path, data in writes:
+            assert path.read_bytes() == data
+
+    def test_fallback_without_liburing(self, tmp_path, monkeypatch):
+        """Test the sequential path when liburing is not installed."""
+        monkeypatch.setattr(_uring_writer, "liburing", None)
+        writes = _payloads(tmp_path, 3)
+        submit_writes(writes)
+
+        for path, data in writes:
+            assert path.read_bytes() == data
+
+    def test_single_write_skips_ring(self, tmp_path, monkeypatch):
+        """Test that a single file is written directly without touching a ring."""
+        monkeypatch.setattr(_uring_writer, "_thread_ring", lambda: pytest.fail("ring used"))
+        writes = _payloads(tmp_path, 1)
+        submit_writes(writes)
+
+        assert writes[0][0].read_bytes() == writes[0][1]
+
+    def test_write_remaining_after_short_write(self, tmp_path, monkeypatch):
+        """Test that the tail of a short write is finished at the right offset."""
+        real_pwrite = os.pwrite
+        # Cap each pwrite at 100 bytes so the loop has to go around several times
+        monkeypatch.setattr(os, "pwrite", lambda fd, view, offset: real_pwrite(fd, view[:100], offset))
+
+        path = tmp_path / "short.bin"
+        data = os.urandom(1000)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, data[:250])
+            _write_remaining(fd, data, 250)
+        finally:
+            os.close(fd)
+
+        assert path.read_bytes() == data
+
+
+class TestSaveImages:
+    """Test cases for LocalStorageService.save_images."""
+
+    def test_save_images_returns_paths_in_order(self, tmp_path):
+        """Test that each image is written and its relative path returned in order."""
+        storage = LocalStorageService(base_path=str(tmp_path / "storage"))
+        items = [(os.urandom(512), "a.png", "generations"), (os.urandom(512), "b.jpg", "originals")]
+
+        paths = storage.save_images(items)
+
+        assert len(paths) == 2
+        assert paths[0].endswith(".png") and "/generations/" in paths[0]
+        assert paths[1].endswith(".jpg") and "/originals/" in paths[1]
+        for relative_path, (data, _, _) in zip(paths, items):
+            assert storage.get_full_path(relative_path).read_bytes() == data
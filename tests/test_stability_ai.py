@@ -3,13 +3,19 @@
 import pytest
 import io
 from unittest.mock import Mock, patch, AsyncMock
-import requests
+import httpx
 from PIL import Image
 
-from services.stability_ai_generation import StabilityAIGenerator
+from services.stability_ai_generation import StabilityAIGenerator, _peek_size
 from utils.exceptions import AIGenerationFailedError
 
 
+@pytest.fixture(scope="class")
+def generator():
+    """One generator per test class; tests patch its client rather than replacing it."""
+    return StabilityAIGenerator("sk-test-key")
+
+
 class TestStabilityAIGenerator:
     """Tests for StabilityAIGenerator class."""
     
@@ -26,9 +32,8 @@ class TestStabilityAIGenerator:
         generator = StabilityAIGenerator("invalid-key")
         assert generator.api_key == "invalid-key"
     
-    def test_create_inpaint_prompt_basic(self):
+    def test_create_inpaint_prompt_basic(self, generator: StabilityAIGenerator):
         """Test basic prompt creation."""
-        generator = StabilityAIGenerator("sk-test-key")
         prompt = generator._create_inpaint_prompt()
         
         assert "Good Natured Brand" in prompt
@@ -37,17 +42,15 @@ class TestStabilityAIGenerator:
         assert "sustainable" in prompt
         assert "photorealistic" in prompt
     
-    def test_create_inpaint_prompt_with_context(self):
+    def test_create_inpaint_prompt_with_context(self, generator: StabilityAIGenerator):
         """Test prompt creation with additional context."""
-        generator = StabilityAIGenerator("sk-test-key")
         prompt = generator._create_inpaint_prompt("golden retriever, playful")
         
         assert "Good Natured Brand" in prompt
         assert "golden retriever, playful" in prompt
     
-    def test_create_clothing_mask(self, sample_dog_image: bytes):
+    def test_create_clothing_mask(self, generator: StabilityAIGenerator, sample_dog_image: bytes):
         """Test clothing mask creation."""
-        generator = StabilityAIGenerator("sk-test-key")
         mask_bytes = generator._create_clothing_mask(sample_dog_image)
         
         assert isinstance(mask_bytes, bytes)
@@ -55,22 +58,34 @@ class TestStabilityAIGenerator:
         
         # Verify it's a valid image
         mask_img = Image.open(io.BytesIO(mask_bytes))
-        assert mask_img.mode == 'RGB'
+        assert mask_img.mode == 'L'
     
-    def test_create_clothing_mask_invalid_image(self):
-        """Test mask creation with invalid image."""
-        generator = StabilityAIGenerator("sk-test-key")
+    def test_create_clothing_mask_cached_by_size(self, generator: StabilityAIGenerator, sample_dog_image: bytes):
+        """Test that masks are reused for images of the same size."""
+        first = generator._create_clothing_mask(sample_dog_image)
+        second = generator._create_clothing_mask(sample_dog_image)
+        
+        assert first is second
+    
+    @pytest.mark.parametrize("format", ["JPEG", "PNG", "WebP"])
+    def test_peek_size(self, format: str):
+        """Test that header-only size parsing matches PIL."""
+        img = Image.new('RGB', (640, 480), color='brown')
+        img_buffer = io.BytesIO()
+        img.save(img_buffer, format=format)
         
+        assert _peek_size(img_buffer.getvalue()) == (640, 480)
+    
+    def test_create_clothing_mask_invalid_image(self, generator: StabilityAIGenerator):
+        """Test mask creation with invalid image."""
         # Should return fallback mask
         mask_bytes = generator._create_clothing_mask(b"invalid")
         assert isinstance(mask_bytes, bytes)
         assert len(mask_bytes) > 0
     
     @pytest.mark.asyncio
-    async def test_generate_image_success(self, sample_dog_image: bytes):
+    async def test_generate_image_success(self, generator: StabilityAIGenerator, sample_dog_image: bytes):
         """Test successful image generation."""
-        generator = StabilityAIGenerator("sk-test-key")
-        
         # Mock successful API response
         mock_response = Mock()
         mock_response.status_code = 200
@@ -81,7 +96,7 @@ class TestStabilityAIGenerator:
         generated_img.save(img_buffer, format='PNG')
         mock_response.content = img_buffer.getvalue()
         
-        with patch('requests.post', return_value=mock_response):
+        with patch.object(generator._client, 'post', new_callable=AsyncMock, return_value=mock_response):
             result = await generator.generate_image(
                 image_bytes=sample_dog_image,
                 dog_description="friendly golden retriever"
@@ -95,10 +110,8 @@ class TestStabilityAIGenerator:
         assert result_img.size == (512, 512)
     
     @pytest.mark.asyncio
-    async def test_generate_image_no_input(self):
+    async def test_generate_image_no_input(self, generator: StabilityAIGenerator):
         """Test generation with no input image."""
-        generator = StabilityAIGenerator("sk-test-key")
-        
         with pytest.raises(AIGenerationFailedError, match="Image must be successfully uploaded"):
             await generator.generate_image(image_bytes=None)
         
@@ -106,93 +119,140 @@ class TestStabilityAIGenerator:
             await generator.generate_image(image_bytes=b"")
     
     @pytest.mark.asyncio
-    async def test_generate_image_api_error(self, sample_dog_image: bytes):
+    async def test_generate_image_api_error(self, generator: StabilityAIGenerator, sample_dog_image: bytes):
         """Test API error handling."""
-        generator = StabilityAIGenerator("sk-test-key")
-        
         # Mock API error response
         mock_response = Mock()
         mock_response.status_code = 400
         mock_response.json.return_value = {"error": "Invalid request"}
         mock_response.text = "Bad Request"
         
-        with patch('requests.post', return_value=mock_response):
+        with patch.object(generator._client, 'post', new_callable=AsyncMock, return_value=mock_response):
             with pytest.raises(AIGenerationFailedError, match="Stability.ai API error: 400"):
                 await generator.generate_image(image_bytes=sample_dog_image)
     
     @pytest.mark.asyncio
-    async def test_generate_image_empty_response(self, sample_dog_image: bytes):
+    async def test_generate_image_empty_response(self, generator: StabilityAIGenerator, sample_dog_image: bytes):
         """Test handling empty API response."""
-        generator = StabilityAIGenerator("sk-test-key")
-        
         # Mock empty response
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.content = b""
         
-        with patch('requests.post', return_value=mock_response):
+        with patch.object(generator._client, 'post', new_callable=AsyncMock, return_value=mock_response):
             with pytest.raises(AIGenerationFailedError, match="No image data received"):
                 await generator.generate_image(image_bytes=sample_dog_image)
     
     @pytest.mark.asyncio
-    async def test_generate_image_invalid_response(self, sample_dog_image: bytes):
+    async def test_generate_image_invalid_response(self, generator: StabilityAIGenerator, sample_dog_image: bytes):
         """Test handling invalid image response."""
-        generator = StabilityAIGenerator("sk-test-key")
-        
         # Mock invalid image response
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.content = b"This is not an image"
         
-        with patch('requests.post', return_value=mock_response):
+        with patch.object(generator._client, 'post', new_callable=AsyncMock, return_value=mock_response):
             with pytest.raises(AIGenerationFailedError, match="Invalid image received"):
                 await generator.generate_image(image_bytes=sample_dog_image)
     
     @pytest.mark.asyncio
-    async def test_generate_image_connection_error(self, sample_dog_image: bytes):
-        """Test connection error handling."""
-        generator = StabilityAIGenerator("sk-test-key")
+    async def test_generate_image_unexpected_content_type(self, generator: StabilityAIGenerator, sample_dog_image: bytes):
+        """Test that unexpected content types fall back to a full image verify."""
+        # PNG signature followed by garbage
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.headers = {"content-type": "application/octet-stream"}
+        mock_response.content = b"\x89PNG\r\n\x1a\n" + b"garbage"
         
-        with patch('requests.post', side_effect=requests.ConnectionError("Connection failed")):
+        with patch.object(generator._client, 'post', new_callable=AsyncMock, return_value=mock_response):
+            with pytest.raises(AIGenerationFailedError, match="Invalid image received"):
+                await generator.generate_image(image_bytes=sample_dog_image)
+    
+    @pytest.mark.asyncio
+    async def test_generate_image_connection_error(self, generator: StabilityAIGenerator, sample_dog_image: bytes):
+        """Test connection error handling."""
+        with patch.object(generator._client, 'post', new_callable=AsyncMock, side_effect=httpx.ConnectError("Connection failed")):
             with pytest.raises(AIGenerationFailedError, match="Failed to connect to Stability.ai API"):
                 await generator.generate_image(image_bytes=sample_dog_image)
     
     @pytest.mark.asyncio
-    async def test_generate_image_timeout(self, sample_dog_image: bytes):
+    async def test_generate_image_timeout(self, generator: StabilityAIGenerator, sample_dog_image: bytes):
         """Test timeout handling."""
-        generator = StabilityAIGenerator("sk-test-key")
-        
-        with patch('requests.post', side_effect=requests.Timeout("Request timed out")):
+        with patch.object(generator._client, 'post', new_callable=AsyncMock, side_effect=httpx.TimeoutException("Request timed out")):
             with pytest.raises(AIGenerationFailedError, match="Failed to connect to Stability.ai API"):
                 await generator.generate_image(image_bytes=sample_dog_image)
     
     @pytest.mark.asyncio
-    async def test_generate_image_quota_exceeded(self, sample_dog_image: bytes):
+    async def test_generate_image_quota_exceeded(self, generator: StabilityAIGenerator, sample_dog_image: bytes):
         """Test quota exceeded error."""
-        generator = StabilityAIGenerator("sk-test-key")
-        
-        with patch('requests.post', side_effect=Exception("Quota exceeded")):
+        with patch.object(generator._client, 'post', new_callable=AsyncMock, side_effect=Exception("Quota exceeded")):
             with pytest.raises(AIGenerationFailedError, match="Stability.ai API quota or rate limit exceeded"):
                 await generator.generate_image(image_bytes=sample_dog_image)
     
     @pytest.mark.asyncio
-    async def test_generate_image_auth_error(self, sample_dog_image: bytes):
+    async def test_generate_image_auth_error(self, generator: StabilityAIGenerator, sample_dog_image: bytes):
         """Test authentication error."""
-        generator = StabilityAIGenerator("sk-test-key")
-        
-        with patch('requests.post', side_effect=Exception("Authentication failed")):
+        with patch.object(generator._client, 'post', new_callable=AsyncMock, side_effect=Exception("Authentication failed")):
             with pytest.raises(AIGenerationFailedError, match="Stability.ai API authentication failed"):
                 await generator.generate_image(image_bytes=sample_dog_image)
     
     @pytest.mark.asyncio
-    async def test_generate_image_content_policy(self, sample_dog_image: bytes):
+    async def test_generate_image_content_policy(self, generator: StabilityAIGenerator, sample_dog_image: bytes):
         """Test content policy error."""
-        generator = StabilityAIGenerator("sk-test-key")
-        
-        with patch('requests.post', side_effect=Exception("Content policy violation")):
+        with patch.object(generator._client, 'post', new_callable=AsyncMock, side_effect=Exception("Content policy violation")):
             with pytest.raises(AIGenerationFailedError, match="Image generation failed: Content policy violation"):
                 await generator.generate_image(image_bytes=sample_dog_image)
     
+    @pytest.mark.asyncio
+    async def test_generate_image_to_file(self, generator: StabilityAIGenerator, sample_dog_image: bytes, tmp_path, monkeypatch):
+        """Test streaming the generated image straight to disk."""
+        generated_img = Image.new('RGB', (512, 512), color='green')
+        img_buffer = io.BytesIO()
+        generated_img.save(img_buffer, format='PNG')
+        png_bytes = img_buffer.getvalue()
+        
+        transport = httpx.MockTransport(
+            lambda request: httpx.Response(200, content=png_bytes, headers={"content-type": "image/png"})
+        )
+        monkeypatch.setattr(generator, "_client", httpx.AsyncClient(transport=transport))
+        
+        output_path = tmp_path / "generated.png"
+        written = await generator.generate_image_to_file(output_path, image_bytes=sample_dog_image)
+        
+        assert written == len(png_bytes)
+        assert output_path.read_bytes() == png_bytes
+    
+    @pytest.mark.asyncio
+    async def test_generate_image_to_file_invalid_response(self, generator: StabilityAIGenerator, sample_dog_image: bytes, tmp_path, monkeypatch):
+        """Test that invalid streamed responses don't leave a file behind."""
+        transport = httpx.MockTransport(
+            lambda request: httpx.Response(200, content=b"This is not an image")
+        )
+        monkeypatch.setattr(generator, "_client", httpx.AsyncClient(transport=transport))
+        
+        output_path = tmp_path / "generated.png"
+        with pytest.raises(AIGenerationFailedError, match="Invalid image received"):
+            await generator.generate_image_to_file(output_path, image_bytes=sample_dog_image)
+        
+        assert not output_path.exists()
+        assert list(tmp_path.iterdir()) == []
+    
+    @pytest.mark.asyncio
+    async def test_generate_image_to_file_keeps_existing_file(self, generator: StabilityAIGenerator, sample_dog_image: bytes, tmp_path, monkeypatch):
+        """Test that a failed generation leaves a pre-existing output file untouched."""
+        transport = httpx.MockTransport(
+            lambda request: httpx.Response(200, content=b"This is not an image")
+        )
+        monkeypatch.setattr(generator, "_client", httpx.AsyncClient(transport=transport))
+    
+        output_path = tmp_path / "generated.png"
+        output_path.write_bytes(b"previous image")
+        with pytest.raises(AIGenerationFailedError):
+            await generator.generate_image_to_file(output_path, image_bytes=sample_dog_image)
+    
+        assert output_path.read_bytes() == b"previous image"
+        assert list(tmp_path.iterdir()) == [output_path]
+    
     def test_health_check_success(self):
         """Test successful health check."""
         generator = StabilityAIGenerator("sk-valid-key-12345")
@@ -219,10 +279,8 @@ class TestStabilityAIIntegration:
     """Integration tests for Stability.ai service."""
     
     @pytest.mark.asyncio
-    async def test_full_pipeline_mock(self, sample_dog_image: bytes):
+    async def test_full_pipeline_mock(self, generator: StabilityAIGenerator, sample_dog_image: bytes):
         """Test full pipeline with mocked API."""
-        generator = StabilityAIGenerator("sk-test-key")
-        
         # Mock the entire request flow
         mock_response = Mock()
         mock_response.status_code = 200
@@ -238,7 +296,7 @@ class TestStabilityAIIntegration:
         generated_img.save(img_buffer, format='PNG')
         mock_response.content = img_buffer.getvalue()
         
-        with patch('requests.post', return_value=mock_response) as mock_post:
+        with patch.object(generator._client, 'post', new_callable=AsyncMock, return_value=mock_response) as mock_post:
             result = await generator.generate_image(
                 image_bytes=sample_dog_image,
                 dog_description="happy golden retriever",
@@ -252,17 +310,19 @@ class TestStabilityAIIntegration:
             # Check URL
             assert "inpaint" in call_args[0][0]
             
-            # Check headers
-            assert "authorization" in call_args[1]["headers"]
-            assert call_args[1]["headers"]["authorization"].startswith("Bearer sk-")
+            # Check headers (auth is set once on the pooled client)
+            assert call_args[1]["headers"]["accept"] == "image/*"
+            assert generator._client.headers["authorization"].startswith("Bearer sk-")
             
             # Check files were sent
-            assert "image" in call_args[1]["files"]
-            assert "mask" in call_args[1]["files"]
+            body = call_args[1]["content"]
+            assert call_args[1]["headers"]["content-type"].startswith("multipart/form-data; boundary=")
+            assert b'name="image"; filename="image.png"' in body
+            assert b'name="mask"; filename="mask.png"' in body
             
             # Check data
-            assert "prompt" in call_args[1]["data"]
-            assert "Good Natured Brand" in call_args[1]["data"]["prompt"]
+            assert b'name="prompt"' in body
+            assert b"Good Natured Brand" in body
         
         # Verify result
         assert isinstance(result, bytes)
@@ -276,9 +336,8 @@ class TestStabilityAIIntegration:
 class TestPromptEngineering:
     """Tests for prompt engineering and creation."""
     
-    def test_prompt_contains_brand_elements(self):
+    def test_prompt_contains_brand_elements(self, generator: StabilityAIGenerator):
         """Test that prompts contain required brand elements."""
-        generator = StabilityAIGenerator("sk-test-key")
         prompt = generator._create_inpaint_prompt("cute puppy")
         
         # Check for brand mentions
@@ -296,10 +355,8 @@ class TestPromptEngineering:
         # Check for style requirements
         assert "photorealistic" in prompt.lower()
     
-    def test_prompt_with_different_dog_descriptions(self):
+    def test_prompt_with_different_dog_descriptions(self, generator: StabilityAIGenerator):
         """Test prompt generation with various dog descriptions."""
-        generator = StabilityAIGenerator("sk-test-key")
-        
         test_cases = [
             "golden retriever, playful",
             "small terrier, energetic", 
@@ -319,9 +376,8 @@ class TestPromptEngineering:
             # Should be reasonably long (detailed prompt)
             assert len(prompt) > 200
     
-    def test_prompt_structure(self):
+    def test_prompt_structure(self, generator: StabilityAIGenerator):
         """Test the structure and quality of generated prompts."""
-        generator = StabilityAIGenerator("sk-test-key")
         prompt = generator._create_inpaint_prompt()
         
         # Should be substantial length
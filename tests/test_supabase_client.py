@@ -0,0 +1,192 @@
+"""Tests for Supabase write batching."""
+
+import asyncio
+import pytest
+
+from services.supabase_client import SupabaseClientService
+
+
+class _Response:
+    """Minimal stand-in for a PostgREST response."""
+    
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class _Query:
+    """Records table operations and replays them against the fake client."""
+    
+    def __init__(self, client):
+        self.client = client
+        self.op = None
+    
+    def insert(self, rows):
+        self.op = ("insert", rows)
+        return self
+    
+    def update(self, data):
+        self.op = ("update", data)
+        return self
+    
+    def select(self, *columns, count=None, head=None):
+        self.op = ("select", columns, {"count": count, "head": head})
+        return self
+    
+    def eq(self, column, value):
+        self.op = self.op + (value,)
+        return self
+    
+    def order(self, column, desc=False):
+        self.op = self.op + (("order", column, desc),)
+        return self
+    
+    def range(self, start, end):
+        self.op = self.op + (("range", start, end),)
+        return self
+    
+    def execute(self):
+        self.client.calls.append(self.op)
+        if self.op[0] == "insert":
+            rows = self.op[1]
+            if any(row["original_image_filename"] == "bad.png" for row in rows):
+                raise RuntimeError("invalid row")
+            return _Response([dict(row, id=f"id-{row['original_image_filename']}") for row in rows])
+        if self.op[0] == "select":
+            if self.op[2]["head"]:
+                return _Response(None, count=self.client.counts[self.op[3]])
+            return _Response([{"id": "rec-1"}])
+        return _Response([{"id": self.op[2]}])
+
+
+class _FakeClient:
+    """Synchronous fake of the supabase-py client."""
+    
+    def __init__(self):
+        self.calls = []
+        self.counts = {"completed": 3, "failed": 1}
+    
+    def table(self, name):
+        return _Query(self)
+
+
+@pytest.fixture
+def service():
+    """Supabase service whose client records requests instead of sending them."""
+    service = SupabaseClientService()
+    service.client = _FakeClient()
+    return service
+
+
+class TestWriteBatching:
+    """Tests for coalesced inserts and updates."""
+    
+    @pytest.mark.asyncio
+    async def test_inserts_are_batched(self, service: SupabaseClientService):
+        """Test that concurrent inserts share one request and get their own rows back."""
+        records = await asyncio.gather(*[
+            service.insert_generation_record(original_filename=f"dog{i}.png", original_size=i + 1)
+            for i in range(5)
+        ])
+        
+        assert [call[0] for call in service.client.calls] == ["insert"]
+        assert [r["id"] for r in records] == [f"id-dog{i}.png" for i in range(5)]
+        await service.close()
+    
+    @pytest.mark.asyncio
+    async def test_inserts_grouped_by_columns(self, service: SupabaseClientService):
+        """Test that rows with different columns go in separate requests."""
+        records = await asyncio.gather(
+            service.insert_generation_record(original_filename="a.png", original_size=1),
+            service.insert_generation_record(original_filename="b.png"),
+        )
+        
+        assert len(service.client.calls) == 2
+        assert [r["original_image_filename"] for r in records] == ["a.png", "b.png"]
+        await service.close()
+    
+    @pytest.mark.asyncio
+    async def test_failed_batch_retries_rows_individually(self, service: SupabaseClientService):
+        """Test that one bad row only fails its own insert."""
+        records = await asyncio.gather(
+            service.insert_generation_record(original_filename="good.png"),
+            service.insert_generation_record(original_filename="bad.png"),
+            service.insert_generation_record(original_filename="other.png"),
+        )
+        
+        assert records[0]["id"] == "id-good.png"
+        assert records[1] is None
+        assert records[2]["id"] == "id-other.png"
+        assert len(service.client.calls) == 4  # one bulk attempt, then one per row
+        await service.close()
+    
+    @pytest.mark.asyncio
+    async def test_updates_to_same_record_are_merged(self, service: SupabaseClientService):
+        """Test that updates to one record collapse into a single request."""
+        results = await asyncio.gather(
+            service.update_generation_status("rec-1", "processing"),
+            service.update_generation_status("rec-1", "completed", processing_time=1.5),
+            service.update_generation_status("rec-2", "failed", error_message="boom"),
+        )
+        
+        assert results == [True, True, True]
+        assert ("update", {"status": "completed", "processing_time": 1.5}, "rec-1") in service.client.calls
+        assert ("update", {"status": "failed", "error_message": "boom"}, "rec-2") in service.client.calls
+        assert len(service.client.calls) == 2
+        await service.close()
+    
+    @pytest.mark.asyncio
+    async def test_close_flushes_pending_writes(self, service: SupabaseClientService):
+        """Test that close() waits for queued writes before stopping the flusher."""
+        pending = asyncio.ensure_future(service.insert_generation_record(original_filename="late.png"))
+        await asyncio.sleep(0)
+        
+        await service.close()
+        
+        assert pending.done()
+        assert pending.result()["id"] == "id-late.png"
+        assert service._flusher_task is None
+    
+    @pytest.mark.asyncio
+    async def test_field_update_merged_with_status_update(self, service: SupabaseClientService):
+        """Test that a URL update queued alongside a status update shares its request."""
+        results = await asyncio.gather(
+            service.update_generation_status("rec-1", "completed"),
+            service.update_generation_fields("rec-1", {"generated_image_url": "http://x/a.png"}),
+        )
+        
+        assert results == [True, True]
+        assert service.client.calls == [
+            ("update", {"status": "completed", "generated_image_url": "http://x/a.png"}, "rec-1")
+        ]
+        await service.close()
+
+
+class TestReads:
+    """Tests for the read queries used by the API endpoints."""
+    
+    @pytest.mark.asyncio
+    async def test_list_generations_query(self, service: SupabaseClientService):
+        """Test that listing filters by status, orders newest first and pages by range."""
+        generations = await service.list_generations(limit=10, offset=20, status="completed")
+        
+        assert generations == [{"id": "rec-1"}]
+        assert service.client.calls == [(
+            "select", ("*",), {"count": None, "head": None},
+            "completed", ("order", "created_at", True), ("range", 20, 29)
+        )]
+    
+    @pytest.mark.asyncio
+    async def test_list_generations_failure_returns_none(self, service: SupabaseClientService, monkeypatch):
+        """Test that a failed listing is reported as None."""
+        monkeypatch.setattr(service.client, "table", lambda name: 1 / 0)
+        
+        assert await service.list_generations(limit=10) is None
+    
+    @pytest.mark.asyncio
+    async def test_count_generations_by_status(self, service: SupabaseClientService):
+        """Test that counts come from head-only count queries, one per status."""
+        counts = await service.count_generations_by_status(["completed", "failed"])
+        
+        assert counts == {"completed": 3, "failed": 1}
+        assert all(call[2] == {"count": "exact", "head": True} for call in service.client.calls)
@@ -0,0 +1,281 @@
+"""Tests for the Supabase Storage service."""
+
+import io
+import os
+import secrets
+import pytest
+import httpx
+import orjson
+
+from config.settings import settings
+from services.supabase_storage import (
+    DOWNLOAD_CHUNK_SIZE,
+    UPLOAD_CHUNK_SIZE,
+    SupabaseStorageService,
+    _content_length,
+    _iter_chunks,
+)
+from utils.exceptions import ImageProcessingError
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    """Storage service pointed at a fake Supabase project."""
+    monkeypatch.setattr(settings, 'supabase_url', "http://sb.local/")
+    monkeypatch.setattr(settings, 'supabase_anon_key', "anon-key")
+    monkeypatch.setattr(settings, 'supabase_service_role_key', None)
+    return SupabaseStorageService()
+
+
+def _mock_transport(storage: SupabaseStorageService, handler) -> list:
+    """Route the service's HTTP client through handler; returns the list of seen requests."""
+    seen = []
+    
+    def record(request: httpx.Request) -> httpx.Response:
+        request.read()
+        seen.append(request)
+        return handler(request)
+    
+    storage._client = httpx.AsyncClient(
+        base_url=storage._client.base_url,
+        headers=storage._client.headers,
+        transport=httpx.MockTransport(record)
+    )
+    return seen
+
+
+class TestUploadImages:
+    """Tests for concurrent batch uploads."""
+    
+    @pytest.mark.asyncio
+    async def test_upload_images_keeps_successful_urls(self, storage: SupabaseStorageService):
+        """Test that one failed upload doesn't discard the other's URL."""
+        def handler(request: httpx.Request) -> httpx.Response:
+            if "/generations/" in request.url.path:
+                return httpx.Response(500, json={"error": "boom"})
+            return httpx.Response(200, json={"Key": "ok"})
+        
+        _mock_transport(storage, handler)
+        
+        uploaded = await storage.upload_images([
+            (b"\x89PNG\r\n\x1a\noriginal", "dog.png", "originals", "image/png"),
+            (b"\x89PNG\r\n\x1a\ngenerated", "generated_dog.png", "generations", "image/png"),
+        ])
+        
+        assert len(uploaded) == 2
+        file_path, public_url = uploaded[0]
+        assert file_path.startswith("originals/")
+        assert public_url == f"http://sb.local/storage/v1/object/public/images/{file_path}"
+        assert uploaded[1] is None
+    
+    @pytest.mark.asyncio
+    async def test_upload_images_slices_one_token_per_item(self, storage: SupabaseStorageService, monkeypatch):
+        """Test that the batch token is split into one 32-hex-character name per upload."""
+        monkeypatch.setattr(secrets, "token_hex", lambda nbytes: "a" * 32 + "b" * 32 + "c" * 32)
+        _mock_transport(storage, lambda request: httpx.Response(200, json={"Key": "ok"}))
+        
+        uploaded = await storage.upload_images([
+            (b"\x89PNG\r\n\x1a\none", "one.png", "originals", "image/png"),
+            (b"\x89PNG\r\n\x1a\ntwo", "two.jpg", "generations", "image/jpeg"),
+            (b"\x89PNG\r\n\x1a\nthree", "three.png", "generations", "image/png"),
+        ])
+        
+        names = [file_path.rsplit("/", 1)[-1] for file_path, _ in uploaded]
+        assert names == ["a" * 32 + ".png", "b" * 32 + ".jpg", "c" * 32 + ".png"]
+        # All uploads in a batch share one date folder
+        assert len({file_path.split("/", 1)[1].rsplit("/", 1)[0] for file_path, _ in uploaded}) == 1
+
+
+class TestStorageEndpoints:
+    """Tests for the request each storage operation sends and how errors surface."""
+    
+    @pytest.mark.asyncio
+    async def test_upload_image_request(self, storage: SupabaseStorageService):
+        """Test the upload URL, auth and content headers, body and returned public URL."""
+        seen = _mock_transport(storage, lambda request: httpx.Response(200, json={"Key": "ok"}))
+        body = b"\x89PNG\r\n\x1a\nimage"
+        
+        file_path, public_url = await storage.upload_image(
+            body, "dog.png", "originals", "image/png", date_prefix="2024/01/02", file_token="f" * 32
+        )
+        
+        assert file_path == f"originals/2024/01/02/{'f' * 32}.png"
+        assert public_url == f"http://sb.local/storage/v1/object/public/images/{file_path}"
+        request = seen[0]
+        assert request.method == "POST"
+        assert request.url == f"http://sb.local/storage/v1/object/images/{file_path}"
+        assert request.headers["apikey"] == "anon-key"
+        assert request.headers["authorization"] == "Bearer anon-key"
+        assert request.headers["content-type"] == "image/png"
+        assert request.headers["cache-control"] == "max-age=3600"
+        assert request.content == body
+    
+    @pytest.mark.asyncio
+    async def test_upload_image_error_mapped(self, storage: SupabaseStorageService):
+        """Test that an HTTP error from the upload surfaces as ImageProcessingError."""
+        _mock_transport(storage, lambda request: httpx.Response(400, json={"error": "bad"}))
+        
+        with pytest.raises(ImageProcessingError, match="Storage upload failed"):
+            await storage.upload_image(b"\x89PNG\r\n\x1a\n", "dog.png")
+    
+    @pytest.mark.asyncio
+    async def test_download_image_request(self, storage: SupabaseStorageService):
+        """Test that downloads GET the object path and return the whole body."""
+        body = b"\xff\xd8\xff" + bytes(DOWNLOAD_CHUNK_SIZE * 2 + 7)
+        seen = _mock_transport(storage, lambda request: httpx.Response(200, content=body))
+        
+        assert await storage.download_image("originals/a.jpg") == body
+        assert seen[0].method == "GET"
+        assert seen[0].url.path == "/storage/v1/object/images/originals/a.jpg"
+        assert seen[0].headers["apikey"] == "anon-key"
+    
+    @pytest.mark.asyncio
+    async def test_download_image_stream_into_file(self, storage: SupabaseStorageService, tmp_path):
+        """Test that streamed downloads land in the sink and report its position."""
+        body = bytes(range(256)) * 1000
+        _mock_transport(storage, lambda request: httpx.Response(200, content=body))
+        
+        path = tmp_path / "download.bin"
+        with open(path, "wb") as sink:
+            written = await storage.download_image_stream("originals/a.bin", sink)
+        
+        assert written == len(body)
+        assert path.read_bytes() == body
+    
+    @pytest.mark.asyncio
+    async def test_download_image_error_mapped(self, storage: SupabaseStorageService):
+        """Test that a failed download surfaces as ImageProcessingError."""
+        _mock_transport(storage, lambda request: httpx.Response(404, text="not found"))
+        
+        with pytest.raises(ImageProcessingError, match="Storage download failed"):
+            await storage.download_image("originals/missing.jpg")
+    
+    @pytest.mark.asyncio
+    async def test_delete_image_request(self, storage: SupabaseStorageService):
+        """Test that deletes send the path as a prefix in a JSON body."""
+        seen = _mock_transport(storage, lambda request: httpx.Response(200, json=[]))
+        
+        assert await storage.delete_image("originals/a.png") is True
+        request = seen[0]
+        assert request.method == "DELETE"
+        assert request.url.path == "/storage/v1/object/images"
+        assert request.headers["content-type"] == "application/json"
+        assert orjson.loads(request.content) == {"prefixes": ["originals/a.png"]}
+    
+    @pytest.mark.asyncio
+    async def test_delete_image_failure_returns_false(self, storage: SupabaseStorageService):
+        """Test that failed deletes report False rather than raising."""
+        _mock_transport(storage, lambda request: httpx.Response(500, text="boom"))
+        assert await storage.delete_image("originals/a.png") is False
+        
+        def raise_error(request):
+            raise httpx.ConnectError("down")
+        
+        _mock_transport(storage, raise_error)
+        assert await storage.delete_image("originals/a.png") is False
+    
+    @pytest.mark.asyncio
+    async def test_generate_signed_url_request(self, storage: SupabaseStorageService):
+        """Test the signing request and that the relative signed path becomes a full URL."""
+        seen = _mock_transport(
+            storage,
+            lambda request: httpx.Response(200, json={"signedURL": "/object/sign/images/a.png?token=t"})
+        )
+        
+        signed_url = await storage.generate_signed_url("a.png", expires_in=60)
+        
+        assert signed_url == "http://sb.local/storage/v1/object/sign/images/a.png?token=t"
+        request = seen[0]
+        assert request.method == "POST"
+        assert request.url.path == "/storage/v1/object/sign/images/a.png"
+        assert orjson.loads(request.content) == {"expiresIn": 60}
+    
+    @pytest.mark.asyncio
+    async def test_generate_signed_url_error_mapped(self, storage: SupabaseStorageService):
+        """Test that a failed signing request surfaces as ImageProcessingError."""
+        _mock_transport(storage, lambda request: httpx.Response(400, text="bad"))
+        
+        with pytest.raises(ImageProcessingError, match="Signed URL generation failed"):
+            await storage.generate_signed_url("a.png")
+    
+    @pytest.mark.asyncio
+    async def test_list_files_request(self, storage: SupabaseStorageService):
+        """Test the listing request body and that the JSON response is returned."""
+        files = [{"name": "a.png", "metadata": {"size": 10}}]
+        seen = _mock_transport(storage, lambda request: httpx.Response(200, json=files))
+        
+        assert await storage.list_files("originals", limit=5, offset=10) == files
+        request = seen[0]
+        assert request.method == "POST"
+        assert request.url.path == "/storage/v1/object/list/images"
+        assert orjson.loads(request.content) == {
+            "prefix": "originals",
+            "limit": 5,
+            "offset": 10,
+            "sortBy": {"column": "name", "order": "asc"}
+        }
+    
+    @pytest.mark.asyncio
+    async def test_list_files_error_mapped(self, storage: SupabaseStorageService):
+        """Test that a failed listing surfaces as ImageProcessingError."""
+        _mock_transport(storage, lambda request: httpx.Response(500, text="boom"))
+        
+        with pytest.raises(ImageProcessingError, match="File listing failed"):
+            await storage.list_files("originals")
+
+
+class TestStreamingUploads:
+    """Tests for chunked upload bodies built from memoryviews and file objects."""
+    
+    def test_content_length(self, tmp_path):
+        """Test that the remaining length is known for bytes, buffers and real files."""
+        assert _content_length(b"abcdef") == 6
+        assert _content_length(memoryview(b"abcdef")[2:]) == 4
+        
+        buffer = io.BytesIO(b"abcdef")
+        buffer.read(2)
+        assert _content_length(buffer) == 4
+        
+        path = tmp_path / "image.bin"
+        path.write_bytes(b"x" * 1000)
+        with open(path, "rb") as f:
+            f.read(100)
+            assert _content_length(f) == 900
+    
+    @pytest.mark.asyncio
+    async def test_iter_chunks_memoryview(self):
+        """Test that memoryviews are split into UPLOAD_CHUNK_SIZE pieces."""
+        data = os.urandom(UPLOAD_CHUNK_SIZE * 2 + 10)
+        chunks = [chunk async for chunk in _iter_chunks(memoryview(data))]
+        
+        assert [len(chunk) for chunk in chunks] == [UPLOAD_CHUNK_SIZE, UPLOAD_CHUNK_SIZE, 10]
+        assert b"".join(chunks) == data
+    
+    @pytest.mark.asyncio
+    async def test_iter_chunks_file(self, tmp_path):
+        """Test that file objects are read in UPLOAD_CHUNK_SIZE pieces."""
+        data = os.urandom(UPLOAD_CHUNK_SIZE + 1)
+        path = tmp_path / "image.bin"
+        path.write_bytes(data)
+        
+        with open(path, "rb") as f:
+            chunks = [chunk async for chunk in _iter_chunks(f)]
+        
+        assert [len(chunk) for chunk in chunks] == [UPLOAD_CHUNK_SIZE, 1]
+        assert b"".join(chunks) == data
+    
+    @pytest.mark.parametrize("kind", ["memoryview", "bytesio", "file"])
+    @pytest.mark.asyncio
+    async def test_upload_image_streams_source(self, storage: SupabaseStorageService, tmp_path, kind: str):
+        """Test that non-bytes sources are sent in full with a Content-Length header."""
+        data = b"\x89PNG\r\n\x1a\n" + os.urandom(UPLOAD_CHUNK_SIZE + 100)
+        seen = _mock_transport(storage, lambda request: httpx.Response(200, json={"Key": "ok"}))
+        
+        path = tmp_path / "image.png"
+        path.write_bytes(data)
+        with open(path, "rb") as f:
+            source = {"memoryview": memoryview(data), "bytesio": io.BytesIO(data), "file": f}[kind]
+            await storage.upload_image(source, "dog.png")
+        
+        assert seen[0].headers["content-length"] == str(len(data))
+        assert seen[0].content == data
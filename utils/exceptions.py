@@ -4,10 +4,12 @@
 class BaseCustomException(Exception):
     """Base class for all custom exceptions."""
     
+    __slots__ = ('message', 'details')
+    
     def __init__(self, message: str, details: str = None):
         self.message = message
         self.details = details
-        super().__init__(self.message)
+        Exception.__init__(self, message)
 
 
 class InvalidImageError(BaseCustomException):
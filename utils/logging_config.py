@@ -2,8 +2,15 @@
 
 import structlog
 import logging
+import orjson
 import sys
-from typing import Any, Dict
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+
+def _orjson_dumps(obj: Any, **kwargs: Any) -> str:
+    """Serialize a log event with orjson, honouring structlog's fallback handler."""
+    return orjson.dumps(obj, default=kwargs.get("default")).decode()
 
 
 def configure_logging(log_level: str = "INFO") -> None:
@@ -27,7 +34,7 @@ def configure_logging(log_level: str = "INFO") -> None:
             structlog.processors.StackInfoRenderer(),
             structlog.processors.format_exc_info,
             structlog.processors.UnicodeDecoder(),
-            structlog.processors.JSONRenderer()
+            structlog.processors.JSONRenderer(serializer=_orjson_dumps)
         ],
         context_class=dict,
         logger_factory=structlog.stdlib.LoggerFactory(),
@@ -41,10 +48,33 @@ def get_logger(name: str) -> structlog.BoundLogger:
     return structlog.get_logger(name)
 
 
+def _enabled(std_logger: logging.Logger, level: int) -> bool:
+    """Check a level against the stdlib logger that structlog renders through."""
+    # Until configure_logging runs, structlog prints everything regardless of stdlib levels
+    return std_logger.isEnabledFor(level) or not structlog.is_configured()
+
+
+# Loggers for the request/response helpers, resolved once at import
+_request_logger = get_logger("api.request")
+_request_std_logger = logging.getLogger("api.request")
+_response_logger = get_logger("api.response")
+_response_std_logger = logging.getLogger("api.response")
+_error_logger = get_logger("api.error")
+_error_std_logger = logging.getLogger("api.error")
+
+
+@lru_cache(maxsize=None)
+def _api_loggers(service: str) -> Tuple[structlog.BoundLogger, logging.Logger]:
+    """Get the structlog and stdlib loggers for a service's API calls."""
+    name = f"{service}.api"
+    return get_logger(name), logging.getLogger(name)
+
+
 def log_request(endpoint: str, method: str, **kwargs) -> None:
     """Log incoming request details."""
-    logger = get_logger("api.request")
-    logger.info(
+    if not _enabled(_request_std_logger, logging.INFO):
+        return
+    _request_logger.info(
         "Request received",
         endpoint=endpoint,
         method=method,
@@ -54,8 +84,9 @@ def log_request(endpoint: str, method: str, **kwargs) -> None:
 
 def log_response(endpoint: str, status_code: int, duration: float, **kwargs) -> None:
     """Log response details."""
-    logger = get_logger("api.response")
-    logger.info(
+    if not _enabled(_response_std_logger, logging.INFO):
+        return
+    _response_logger.info(
         "Response sent",
         endpoint=endpoint,
         status_code=status_code,
@@ -66,8 +97,9 @@ def log_response(endpoint: str, status_code: int, duration: float, **kwargs) ->
 
 def log_error(error: Exception, context: Dict[str, Any] = None) -> None:
     """Log error details."""
-    logger = get_logger("api.error")
-    logger.error(
+    if not _enabled(_error_std_logger, logging.ERROR):
+        return
+    _error_logger.error(
         "Error occurred",
         error_type=type(error).__name__,
         error_message=str(error),
@@ -77,11 +109,13 @@ def log_error(error: Exception, context: Dict[str, Any] = None) -> None:
 
 def log_api_call(service: str, operation: str, duration: float, success: bool, **kwargs) -> None:
     """Log API call details."""
-    logger = get_logger(f"{service}.api")
+    logger, std_logger = _api_loggers(service)
+    if not _enabled(std_logger, logging.INFO):
+        return
     logger.info(
         f"{service.title()} API call",
         operation=operation,
         duration_ms=round(duration * 1000, 2),
         success=success,
         **kwargs
-    ) 
\ No newline at end of file
+    )
\ No newline at end of file
@@ -0,0 +1,23 @@
+"""Cached UTC timestamp helpers for high-frequency response fields."""
+
+import time
+from datetime import datetime, timezone
+
+
+# Cached ISO string and the second it was built for
+_TS = {"s": "", "t": 0}
+
+
+def isoformat_utc_now() -> str:
+    """
+    Get the current UTC time as an ISO 8601 string, at one-second resolution.
+    
+    The string is rebuilt at most once per second, so it is suited for
+    informational timestamps (health checks, statistics) but not for values
+    that must be exact, such as database record timestamps.
+    """
+    now = int(time.time())
+    if now != _TS["t"]:
+        _TS["s"] = datetime.fromtimestamp(now, tz=timezone.utc).isoformat()
+        _TS["t"] = now
+    return _TS["s"]